@@ -1,9 +1,16 @@
+import os
 import pygame
-import random
+from sudoku_core import SYMBOLS, Board, ConflictTracker, solve
+from sudoku_pool import PuzzlePool
 
 # Initialize Pygame
 pygame.init()
 
+# Board size: SUDOKU_BOX=4 gives 16x16 and SUDOKU_BOX=5 gives 25x25
+BOX = int(os.environ.get("SUDOKU_BOX", "3"))
+SIZE = BOX * BOX
+LETTER_KEYS = {SYMBOLS[value]: value for value in range(10, SIZE + 1)}  # Values above 9 are typed as letters
+
 # Window dimensions and colors
 WIDTH, HEIGHT = 600, 700
 WIN = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -16,19 +23,17 @@ GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 
 # Fonts
-FONT = pygame.font.SysFont("comicsans", 40)
+FONT = pygame.font.SysFont("comicsans", 40 * 9 // SIZE)  # Scaled down with the cell size
 FONT_SMALL = pygame.font.SysFont("comicsans", 20)
 
 # Initialize the board
-board = [[0 for _ in range(9)] for _ in range(9)]
-original_board = [[0 for _ in range(9)] for _ in range(9)]
+board = Board(BOX)
+original_board = Board(BOX)
+tracker = ConflictTracker(board)  # Row, column and box digit counts for checking moves
 
-# Difficulty levels
-difficulties = {
-    "Easy": 20,
-    "Medium": 30,
-    "Hard": 40
-}
+# Ready puzzles per difficulty, refilled in the background and kept between runs
+POOL_FILE = "puzzle_pool.json" if BOX == 3 else f"puzzle_pool_{SIZE}x{SIZE}.json"
+puzzle_pool = PuzzlePool(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), POOL_FILE), box=BOX)
 
 # Button class to create and draw buttons
 class Button:
@@ -60,131 +65,37 @@ hard_button = Button(300, 620, 100, 50, "Hard")
 
 # Draw the grid lines on the window
 def draw_grid(win):
-    gap = WIDTH // 9
-    for i in range(10):
-        thickness = 4 if i % 3 == 0 else 1
+    gap = WIDTH // SIZE
+    for i in range(SIZE + 1):
+        thickness = 4 if i % BOX == 0 else 1
         pygame.draw.line(win, BLACK, (0, i * gap), (WIDTH, i * gap), thickness)
         pygame.draw.line(win, BLACK, (i * gap, 0), (i * gap, WIDTH), thickness)
 
 # Draw the numbers on the board
 def draw_board(win, board):
-    gap = WIDTH // 9
+    gap = WIDTH // SIZE
     for i in range(len(board)):
         for j in range(len(board[i])):
             if board[i][j] != 0:
-                text = FONT.render(str(board[i][j]), 1, BLACK)
-                win.blit(text, (j * gap + 20, i * gap + 15))
-
-# Clear the board by setting all values to 0
-def clear_board(board):
-    for i in range(9):
-        for j in range(9):
-            board[i][j] = 0
+                text = FONT.render(SYMBOLS[board[i][j]], 1, BLACK)
+                win.blit(text, (j * gap + 20 * 9 // SIZE, i * gap + 15 * 9 // SIZE))
 
-# Generate a new puzzle with the given difficulty level
+# Load a new puzzle with the given difficulty level from the pool
 def generate_puzzle(board, difficulty):
-    clear_board(board)
-    fill_diagonal_boxes(board)
-    fill_remaining(board, 0, 0)
-    remove_digits(board, difficulty)
-    # Store the original board for resetting
-    for i in range(9):
-        for j in range(9):
-            original_board[i][j] = board[i][j]
-
-# Fill the diagonal 3x3 boxes with random numbers
-def fill_diagonal_boxes(board):
-    for i in range(0, 9, 3):
-        fill_box(board, i, i)
-
-# Fill a 3x3 box with random numbers
-def fill_box(board, row, col):
-    num = random.sample(range(1, 10), 9)
-    for i in range(3):
-        for j in range(3):
-            board[row + i][col + j] = num.pop()
-
-# Fill the remaining cells using backtracking
-def fill_remaining(board, i, j):
-    if j >= 9 and i < 8:
-        i += 1
-        j = 0
-    if i >= 9 and j >= 9:
-        return True
-    if i < 3:
-        if j < 3:
-            j = 3
-    elif i < 6:
-        if j == (i // 3) * 3:
-            j += 3
-    else:
-        if j == 6:
-            i += 1
-            j = 0
-            if i >= 9:
-                return True
-    for num in range(1, 10):
-        if is_safe(board, i, j, num):
-            board[i][j] = num
-            if fill_remaining(board, i, j + 1):
-                return True
-            board[i][j] = 0
-    return False
-
-# Remove digits from the board based on the difficulty level
-def remove_digits(board, difficulty):
-    count = difficulties[difficulty]
-    while count != 0:
-        row = random.randint(0, 8)
-        col = random.randint(0, 8)
-        while board[row][col] == 0:
-            row = random.randint(0, 8)
-            col = random.randint(0, 8)
-        board[row][col] = 0
-        count -= 1
-
-# Check if a number can be placed in a specific cell
-def is_safe(board, row, col, num):
-    # Check the row and column
-    for x in range(9):
-        if board[row][x] == num or board[x][col] == num:
-            return False
-    # Check the 3x3 box
-    start_row, start_col = row - row % 3, col - col % 3
-    for i in range(3):
-        for j in range(3):
-            if board[i + start_row][j + start_col] == num:
-                return False
-    return True
-
-# Find the next empty cell
-def find_empty(board):
-    for i in range(9):
-        for j in range(9):
-            if board[i][j] == 0:
-                return (i, j)
-    return None
-
-# Solve the Sudoku puzzle using backtracking
-def solve(board):
-    empty = find_empty(board)
-    if not empty:
-        return True
-    row, col = empty
-    for num in range(1, 10):
-        if is_safe(board, row, col, num):
-            board[row][col] = num
-            if solve(board):
-                return True
-            board[row][col] = 0
-    return False
+    puzzle = puzzle_pool.get(difficulty)
+    # Copy it onto the board and store the original board for resetting
+    board.restore(puzzle.cells)
+    original_board.restore(puzzle.cells)
+    tracker.load(board)
 
 # Get the row and column from the mouse position
 def get_mouse_pos(pos):
     x, y = pos
-    gap = WIDTH // 9
+    gap = WIDTH // SIZE
     row = y // gap
     col = x // gap
+    if row >= SIZE or col >= SIZE:
+        return None, None  # The strip between the grid and the buttons
     return row, col
 
 # Draw the window with the board, buttons, and grid
@@ -200,15 +111,15 @@ def draw_window(win, board):
 
 # Reset the board to the original state
 def reset_board():
-    for i in range(9):
-        for j in range(9):
-            board[i][j] = original_board[i][j]
+    board.restore(original_board.cells)
+    tracker.load(board)
 
 # Main game loop
 def main():
     run = True
     key = None
     difficulty = "Easy"
+    puzzle_pool.start()  # Generate puzzles in the background
     generate_puzzle(board, difficulty)
     row, col = None, None
     while run:
@@ -223,6 +134,7 @@ def main():
                         print("Solved successfully!")
                     else:
                         print("Failed to solve.")
+                    tracker.load(board)
                 elif easy_button.is_over(pos):
                     difficulty = "Easy"
                     generate_puzzle(board, difficulty)
@@ -258,16 +170,20 @@ def main():
                             key = 8
                         elif event.key == pygame.K_9 or event.key == pygame.K_KP9:
                             key = 9
+                        elif event.unicode.upper() in LETTER_KEYS:
+                            key = LETTER_KEYS[event.unicode.upper()]
                         elif event.key == pygame.K_BACKSPACE or event.key == pygame.K_DELETE:
                             key = 0
                         if key is not None:
-                            if key == 0 or is_safe(board, row, col, key):
+                            if key == 0 or tracker.can_place(row, col, key):
                                 board[row][col] = key
+                                tracker.set(row, col, key)
                                 key = None
                             else:
                                 print("Invalid move!")
         draw_window(WIN, board)
         pygame.display.flip()
+    puzzle_pool.stop()  # Save the ready puzzles for the next run
     pygame.quit()
 
 # Entry point of the program
@@ -278,29 +194,24 @@ if __name__ == "__main__":
 Execution flow:
 
 1. The program initializes Pygame and sets up the window dimensions, colors, and fonts.
-2. The board and original_board lists are initialized to store the Sudoku puzzle.
-3. The difficulty levels are defined in a dictionary.
-4. The Button class is defined to create and draw buttons on the window.
-5. The buttons for solving, and selecting difficulty levels are created.
-6. The draw_grid function draws the grid lines on the window.
-7. The draw_board function draws the numbers on the board.
-8. The clear_board function sets all values on the board to 0.
-9. The generate_puzzle function generates a new Sudoku puzzle based on the selected difficulty level.
-10. The fill_diagonal_boxes function fills the diagonal 3x3 boxes with random numbers.
-11. The fill_box function fills a 3x3 box with random numbers.
-12. The fill_remaining function fills the remaining cells using backtracking.
-13. The remove_digits function removes digits from the board based on the difficulty level.
-14. The is_safe function checks if a number can be placed in a specific cell.
-15. The find_empty function finds the next empty cell on the board.
-16. The solve function solves the Sudoku puzzle using backtracking.
-17. The get_mouse_pos function gets the row and column from the mouse position.
-18. The draw_window function draws the window with the board, buttons, and grid.
-19. The reset_board function resets the board to the original state.
-20. The main function is the game loop that handles user input and updates the game state.
-21. The program starts by calling the main function.
+2. The board and original_board Boards are initialized to store the Sudoku puzzle.
+3. The Button class is defined to create and draw buttons on the window.
+4. The buttons for solving, and selecting difficulty levels are created.
+5. The draw_grid function draws the grid lines on the window.
+6. The draw_board function draws the numbers on the board.
+7. The generate_puzzle function takes a ready puzzle from the background puzzle pool and stores it for resetting.
+8. The get_mouse_pos function gets the row and column from the mouse position.
+9. The draw_window function draws the window with the board, buttons, and grid.
+10. The reset_board function resets the board to the original state.
+11. The main function is the game loop that handles user input and updates the game state.
+12. The program starts by calling the main function.
+
+The puzzle logic (difficulty levels, generation, the ConflictTracker and solve) lives in
+sudoku_core.py, which does not depend on pygame and can be used without a window.
 
 Features:
 - Generate Sudoku puzzles with different difficulty levels (Easy, Medium, Hard)
+- Play 16x16 or 25x25 boards with SUDOKU_BOX=4 or SUDOKU_BOX=5 (values above 9 are letters)
 - Solve the puzzle using the "Solve" button
 - User can input numbers by clicking on the cells and typing on the keyboard
 - Invalid moves are prevented
@@ -1,14 +1,17 @@
-# Import necessary modules
-import pygame
-import random
+# Import necessary modules. pygame is imported by open_window(), so importing
+# this module for its game logic never loads pygame or opens a window.
 import time
+START_TIME = time.perf_counter()  # For the startup times printed after the first frame
+import json
+import os
+from sudoku_core import SYMBOLS, Board, ConflictTracker, solve, solve_steps
+from sudoku_pool import PuzzlePool
 
-pygame.init()
+pygame = None  # Set by open_window()
 
 # Window dimensions and colors
 WIDTH, HEIGHT = 600, 700
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Sudoku Solver")
+WIN = None  # The display surface, set by open_window()
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 GREY = (128, 128, 128)
@@ -16,22 +19,82 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
+PINK = (255, 200, 200)  # Background of conflicting digits, dead-end cells and wrong digits
 
-# Fonts
-FONT = pygame.font.SysFont("comicsans", 40)
-FONT_SMALL = pygame.font.SysFont("comicsans", 20)
+# Board size: SUDOKU_BOX=4 gives 16x16 and SUDOKU_BOX=5 gives 25x25
+BOX = int(os.environ.get("SUDOKU_BOX", "3"))
+SIZE = BOX * BOX
+LETTER_KEYS = {SYMBOLS[value]: value for value in range(10, SIZE + 1)}  # Values above 9 are typed as letters
+
+# Animation settings
+FPS = 60  # Frame cap for the main loop
+STEPS_PER_FRAME = 1  # Solver steps shown per frame; + and - change it while solving
+SKIP_BUDGET_MS = 10  # Search time per frame when skipping to the end of a solve
+SKIP_TIMEOUT_S = 30  # Search time after which skipping gives up on the puzzle
+HINT_TIMEOUT_S = 5  # Search time allowed for the solution behind hints and checks
+
+# Fonts, loaded by open_window(). Finding a system font by name scans every
+# installed font, so the path found is saved in FONT_CACHE_FILE and reused by
+# later runs while the file still exists.
+FONT_NAME = "comicsans"
+FONT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "font_cache.json")
+FONT = None  # Digits, scaled down with the cell size
+DIGIT_OFFSET = (20 * 9 // SIZE, 15 * 9 // SIZE)  # Digit position inside a cell
+FONT_SMALL = None  # Button labels
+FONT_MARK = None  # Candidates shown in the selected cell
 
 # Initialize the board
-board = [[0 for _ in range(9)] for _ in range(9)]  # Create a 9x9 board filled with zeros
-original_board = [[0 for _ in range(9)] for _ in range(9)]  # Store the original board
-solved_cells = [[False for _ in range(9)] for _ in range(9)]  # Track solved cells
+board = Board(BOX)  # Create an empty board
+original_board = Board(BOX)  # Store the original board
+solved_cells = bytearray(SIZE * SIZE)  # 1 for cells filled by the solver, indexed like board.cells
+tracker = ConflictTracker(board)  # Conflicts and candidates of the board as the user edits it
+solution = Board(BOX)  # Solution of the current puzzle, worked out on the first hint or check
+wrong_cells = set()  # Cells the last check found wrong, until they are edited
+
+# Ready puzzles per difficulty, refilled in the background and kept between runs
+POOL_FILE = "puzzle_pool.json" if BOX == 3 else f"puzzle_pool_{SIZE}x{SIZE}.json"
+puzzle_pool = PuzzlePool(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), POOL_FILE), box=BOX)
 
-# Difficulty levels
-difficulties = {
-    "Easy": 20,
-    "Medium": 30,
-    "Hard": 40
-}
+def font_path(name):
+    # Path of the system font called name (None for pygame's default font),
+    # from the cache file if an earlier run already found it. Only found paths
+    # are cached, so a font installed later is picked up by the next scan.
+    try:
+        with open(FONT_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if not isinstance(cache, dict):
+        cache = {}
+    path = cache.get(name)
+    if isinstance(path, str) and os.path.exists(path):
+        return path
+    path = pygame.font.match_font(name)  # The slow scan of the installed fonts
+    if path is None:
+        return None
+    cache[name] = path
+    try:
+        tmp_path = FONT_CACHE_FILE + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, FONT_CACHE_FILE)
+    except OSError:
+        pass  # Not saved; the next run looks the font up again
+    return path
+
+def open_window():
+    # Import pygame, start only the display and font modules and create the
+    # window and fonts
+    global pygame, WIN, FONT, FONT_SMALL, FONT_MARK
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Sudoku Solver")
+    path = font_path(FONT_NAME)
+    FONT = pygame.font.Font(path, 40 * 9 // SIZE)
+    FONT_SMALL = pygame.font.Font(path, 20)
+    FONT_MARK = pygame.font.Font(path, max(8, 14 * 9 // SIZE))
 
 # Button class to create clickable buttons
 class Button:
@@ -59,216 +122,266 @@ solve_button = Button(425, 620, 100, 50, "Solve")
 easy_button = Button(50, 620, 100, 50, "Easy")
 medium_button = Button(175, 620, 100, 50, "Medium")
 hard_button = Button(300, 620, 100, 50, "Hard")
+buttons = [solve_button, easy_button, medium_button, hard_button]
 
 def draw_grid(win):
     # Draw the grid lines on the Sudoku board
-    gap = WIDTH // 9
-    for i in range(10):
-        thickness = 4 if i % 3 == 0 else 1  # Thicker lines for box boundaries
+    gap = WIDTH // SIZE
+    for i in range(SIZE + 1):
+        thickness = 4 if i % BOX == 0 else 1  # Thicker lines for box boundaries
         pygame.draw.line(win, BLACK, (0, i * gap), (WIDTH, i * gap), thickness)
         pygame.draw.line(win, BLACK, (i * gap, 0), (i * gap, WIDTH), thickness)
 
-def draw_board(win, board, highlight=None):
-    # Draw the numbers on the Sudoku board
-    gap = WIDTH // 9
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] != 0:
-                color = RED if solved_cells[i][j] else BLACK  # Use different colors for solved and unsolved cells
-                text = FONT.render(str(board[i][j]), 1, color)
-                win.blit(text, (j * gap + 20, i * gap + 15))
-            if highlight and highlight == (i, j):  # Highlight the selected cell
-                pygame.draw.rect(win, YELLOW, (j * gap, i * gap, gap, gap), 3)
-
-def clear_board(board):
-    # Clear the Sudoku board and reset solved_cells
-    for i in range(9):
-        for j in range(9):
-            board[i][j] = 0
-            solved_cells[i][j] = False
-
-def generate_puzzle(board, difficulty):
-    # Generate a new Sudoku puzzle with the specified difficulty
-    clear_board(board)
-    fill_diagonal_boxes(board)  # Fill the diagonal 3x3 boxes
-    fill_remaining(board, 0, 0)  # Fill the remaining cells
-    remove_digits(board, difficulty)  # Remove digits based on the difficulty level
-    for i in range(9):
-        for j in range(9):
-            original_board[i][j] = board[i][j]  # Store the original board
-            solved_cells[i][j] = False  # Reset solved_cells
-
-def fill_diagonal_boxes(board):
-    # Fill the diagonal 3x3 boxes with random numbers
-    for i in range(0, 9, 3):
-        fill_box(board, i, i)
-
-def fill_box(board, row, col):
-    # Fill a 3x3 box with random numbers
-    num = random.sample(range(1, 10), 9)  # Generate a list of random numbers from 1 to 9
-    for i in range(3):
-        for j in range(3):
-            board[row + i][col + j] = num.pop()  # Assign a random number to each cell in the box
+class BoardRenderer:
+    # Retained rendering layer: a cached background with the grid and buttons,
+    # digit glyphs pre-rendered for each color, and what every cell showed on the
+    # last frame. A frame only redraws and updates the cells that changed.
+    def __init__(self, win):
+        self.win = win
+        self.gap = WIDTH // SIZE
+        self.background = pygame.Surface(win.get_size())
+        self.background.fill(WHITE)
+        draw_grid(self.background)
+        for button in buttons:
+            button.draw(self.background)
+        self.glyphs = {color: [None] + [FONT.render(SYMBOLS[num], 1, color) for num in range(1, SIZE + 1)]
+                       for color in (BLACK, RED)}
+        self.marks = [None] + [FONT_MARK.render(SYMBOLS[num], 1, GREY) for num in range(1, SIZE + 1)]
+        self.shown = [None] * (SIZE * SIZE)  # (num, solved, highlighted, flagged, candidates) per cell
+        self.full_redraw = True
 
-def fill_remaining(board, i, j):
-    # Fill the remaining cells in the Sudoku board using backtracking
-    if j >= 9 and i < 8:
-        i += 1
-        j = 0
-    if i >= 9 and j >= 9:
-        return True
-    if i < 3:
-        if j < 3:
-            j = 3
-    elif i < 6:
-        if j == (i // 3) * 3:
-            j += 3
-    else:
-        if j == 6:
-            i += 1
-            j = 0
-            if i >= 9:
-                return True
-    for num in range(1, 10):
-        if is_safe(board, i, j, num):
-            board[i][j] = num
-            if fill_remaining(board, i, j + 1):
-                return True
-            board[i][j] = 0
-    return False
+    def draw(self, board, highlight=None, tracker=None, wrong=()):
+        # Redraw the cells whose digit, color, highlight or flags changed since the
+        # last frame. With a tracker, conflicting digits and dead-end cells are
+        # flagged and the selected empty cell shows its candidates.
+        if self.full_redraw:
+            self.win.blit(self.background, (0, 0))
+            self.shown = [None] * (SIZE * SIZE)
+        gap = self.gap
+        cells = board.cells
+        conflicts = tracker.conflicts if tracker is not None else ()
+        dead = tracker.dead if tracker is not None else ()
+        dirty = []
+        for i in range(SIZE):
+            for j in range(SIZE):
+                k = i * SIZE + j
+                num = cells[k]
+                selected = highlight == (i, j)
+                cell = (num, num != 0 and solved_cells[k] == 1, selected, k in conflicts or k in dead or k in wrong,
+                        tracker.candidates_at(k) if selected and num == 0 and tracker is not None else 0)
+                if cell == self.shown[k]:
+                    continue
+                self.shown[k] = cell
+                rect = pygame.Rect(j * gap, i * gap, gap, gap)
+                self.win.blit(self.background, rect, rect)  # Restore the empty cell and its grid lines
+                if cell[3]:
+                    self.win.fill(PINK, rect.inflate(-4, -4))
+                if cell[4]:
+                    self.draw_marks(rect, cell[4])
+                if num != 0:
+                    color = RED if cell[1] else BLACK  # Use different colors for solved and unsolved cells
+                    self.win.blit(self.glyphs[color][num], (j * gap + DIGIT_OFFSET[0], i * gap + DIGIT_OFFSET[1]))
+                if cell[2]:  # Highlight the selected cell
+                    pygame.draw.rect(self.win, YELLOW, rect, 3)
+                dirty.append(rect)
+        if self.full_redraw:
+            pygame.display.update()
+            self.full_redraw = False
+        elif dirty:
+            pygame.display.update(dirty)
 
-def remove_digits(board, difficulty):
-    # Remove digits from the board based on the difficulty level
-    count = difficulties[difficulty]
-    while count != 0:
-        row = random.randint(0, 8)
-        col = random.randint(0, 8)
-        while board[row][col] == 0:  # Find a non-empty cell
-            row = random.randint(0, 8)
-            col = random.randint(0, 8)
-        board[row][col] = 0  # Remove the digit
-        count -= 1
+    def draw_marks(self, rect, mask):
+        # Small candidate digits laid out like the cells of a box
+        step = self.gap / BOX
+        for num in range(1, SIZE + 1):
+            if mask >> (num - 1) & 1:
+                glyph = self.marks[num]
+                x = rect.x + ((num - 1) % BOX + 0.5) * step - glyph.get_width() / 2
+                y = rect.y + ((num - 1) // BOX + 0.5) * step - glyph.get_height() / 2
+                self.win.blit(glyph, (x, y))
 
-def is_safe(board, row, col, num):
-    # Check if it's safe to place a number in a specific cell
-    for x in range(9):
-        if board[row][x] == num or board[x][col] == num:  # Check row and column
-            return False
-    start_row, start_col = row - row % 3, col - col % 3  # Get the starting row and column of the 3x3 box
-    for i in range(3):
-        for j in range(3):
-            if board[i + start_row][j + start_col] == num:  # Check the 3x3 box
-                return False
-    return True
+def generate_puzzle(board, difficulty):
+    # Load a new Sudoku puzzle with the specified difficulty from the pool
+    puzzle = puzzle_pool.get(difficulty)
+    board.restore(puzzle.cells)
+    original_board.restore(puzzle.cells)  # Store the original board
+    solved_cells[:] = bytes(SIZE * SIZE)  # Reset solved_cells
+    solution.clear()  # Worked out again when first needed
+    wrong_cells.clear()
+    tracker.load(board)
 
-def find_empty(board):
-    # Find the next empty cell in the Sudoku board
-    for i in range(9):
-        for j in range(9):
-            if board[i][j] == 0:
-                return (i, j)
-    return None
+def puzzle_solution():
+    # The solution of the current puzzle, solved once and reused by every hint
+    # and check; None if the search gives up
+    if 0 in solution.cells:
+        solution.restore(original_board.cells)
+        if not solve(solution, timeout=HINT_TIMEOUT_S):
+            return None
+    return solution
 
-def solve_with_animation(board, win):
-    # Solve the Sudoku board with animation
-    empty = find_empty(board)
-    if not empty:
-        return True
-    row, col = empty
-    for num in range(1, 10):
-        if is_safe(board, row, col, num):
-            board[row][col] = num
-            solved_cells[row][col] = True
-            animate_number_selection(win, board, row, col, num)
-            pygame.event.pump()  # Process events to keep the window responsive
-            if solve_with_animation(board, win):
-                return True
-            board[row][col] = 0
-            solved_cells[row][col] = False
-            animate_number_selection(win, board, row, col, 0)
-            pygame.event.pump()  # Process events to keep the window responsive
-    return False
+class SolveAnimation:
+    # Runs the solver as a step generator so the main loop can show a few steps
+    # per frame and stay responsive however deep the search goes
+    def __init__(self, board, steps_per_frame=STEPS_PER_FRAME):
+        self.steps = solve_steps(board)  # Updates the board in place as it goes
+        self.steps_per_frame = steps_per_frame
+        self.paused = False
+        self.skipping = False  # Run the search to the end within a time budget per frame
+        self.done = False
+        self.solved = False
+        self.timed_out = False
+        self.skip_seconds = 0.0  # Search time spent skipping so far
+        self.last_cell = None  # Most recently changed cell, highlighted while solving
+        self.start_time = time.time()
 
-def animate_number_selection(win, board, row, col, final_num):
-    # Animate the selection of a number in a cell
-    gap = WIDTH // 9
-    for num in range(1, 10):
-        pygame.draw.rect(win, WHITE, (col * gap + 1, row * gap + 1, gap - 1, gap - 1))  # Clear the cell
-        text = FONT.render(str(num), 1, RED)
-        win.blit(text, (col * gap + 20, row * gap + 15))  # Draw the number
-        pygame.display.update()
-        pygame.time.delay(50)
-    pygame.draw.rect(win, WHITE, (col * gap + 1, row * gap + 1, gap - 1, gap - 1))  # Clear the cell
-    if final_num != 0:
-        text = FONT.render(str(final_num), 1, RED)
-        win.blit(text, (col * gap + 20, row * gap + 15))  # Draw the final number
-    pygame.display.update()
-    pygame.time.delay(100)
+    def advance(self):
+        # Apply this frame's share of solver steps and return True once the search is over
+        if self.done or (self.paused and not self.skipping):
+            return self.done
+        frame_start = time.perf_counter()
+        deadline = frame_start + SKIP_BUDGET_MS / 1000
+        count = 0
+        while True:
+            try:
+                action, row, col, num = next(self.steps)
+            except StopIteration as finished:
+                self.done = True
+                self.solved = bool(finished.value)
+                break
+            solved_cells[row * SIZE + col] = action == "place"  # Solver digits are drawn in red
+            self.last_cell = (row, col)
+            count += 1
+            if self.skipping:
+                if count % 256 == 0 and time.perf_counter() > deadline:
+                    break
+            elif count >= self.steps_per_frame:
+                break
+        if self.skipping and not self.done:
+            self.skip_seconds += time.perf_counter() - frame_start
+            if self.skip_seconds > SKIP_TIMEOUT_S:
+                self.done = True  # Give up rather than spin on a pathological puzzle
+                self.timed_out = True
+        return self.done
 
 def get_mouse_pos(pos):
     # Get the row and column of the cell based on the mouse position
     x, y = pos
-    gap = WIDTH // 9
+    gap = WIDTH // SIZE
     row = y // gap
     col = x // gap
+    if row >= SIZE or col >= SIZE:
+        return None, None  # The strip between the grid and the buttons
     return row, col
 
-def draw_window(win, board):
-    # Draw the Sudoku board and buttons on the window
-    win.fill(WHITE)
-    draw_grid(win)
-    draw_board(win, board)
-    solve_button.draw(win)
-    easy_button.draw(win)
-    medium_button.draw(win)
-    hard_button.draw(win)
-    pygame.display.update()
-
 def reset_board():
     # Reset the board to the original state
-    for i in range(9):
-        for j in range(9):
-            board[i][j] = original_board[i][j]
-            solved_cells[i][j] = False
+    board.restore(original_board.cells)
+    solved_cells[:] = bytes(SIZE * SIZE)
+    wrong_cells.clear()
+    tracker.load(board)
+
+def enter_digit(row, col, num):
+    # Put a digit typed by the user (0 clears the cell) on the board. Conflicts
+    # are not refused: the tracker flags them and the renderer highlights them.
+    board[row][col] = num
+    solved_cells[row * SIZE + col] = 0
+    wrong_cells.discard(row * SIZE + col)
+    tracker.set(row, col, num)
+    if tracker.dead:
+        print(f"Dead end: {len(tracker.dead)} empty cell(s) have no candidates left.")
+    elif not tracker.conflicts and 0 not in board.cells:
+        print("Puzzle complete!")
+
+def give_hint():
+    # Fill in one cell from the solution: a cell with a single candidate if
+    # there is one, so the hint is one the user could have found
+    answer = puzzle_solution()
+    if answer is None:
+        print("No hint available.")
+        return
+    single = tracker.hint()
+    if single is not None:
+        i = single[0] * SIZE + single[1]
+    elif 0 in board.cells:
+        i = board.cells.index(0)
+    else:
+        return
+    enter_digit(i // SIZE, i % SIZE, answer.cells[i])
+
+def check_board():
+    # Flag the digits that differ from the solution
+    answer = puzzle_solution()
+    if answer is None:
+        print("Could not work out the solution to check against.")
+        return
+    wrong_cells.clear()
+    wrong_cells.update(i for i, num in enumerate(board.cells) if num and num != answer.cells[i])
+    print(f"{len(wrong_cells)} wrong digit(s)." if wrong_cells else "Everything so far is correct.")
 
 def main():
     # Main game loop
+    imported = time.perf_counter()
+    open_window()
+    window_open = time.perf_counter()
     run = True
     key = None
     difficulty = "Easy"
+    puzzle_pool.start()  # Generate puzzles in the background
     generate_puzzle(board, difficulty)
     row, col = None, None
+    clock = pygame.time.Clock()
+    renderer = BoardRenderer(WIN)
+    animation = None  # SolveAnimation while the solver is running
+    first_frame = True
     while run:
+        clock.tick(FPS)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
+            if event.type == pygame.VIDEOEXPOSE or event.type == pygame.WINDOWEXPOSED:
+                renderer.full_redraw = True  # The window contents were lost
             if event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
                 if solve_button.is_over(pos):
                     reset_board()
-                    start_time = time.time()
-                    if solve_with_animation(board, WIN):
-                        end_time = time.time()
-                        solve_time = end_time - start_time
-                        print(f"Solved successfully in {solve_time:.2f} seconds!")
-                    else:
-                        print("Failed to solve.")
+                    animation = SolveAnimation(board)
                 elif easy_button.is_over(pos):
                     difficulty = "Easy"
+                    animation = None  # A new puzzle cancels a running solve
                     generate_puzzle(board, difficulty)
                 elif medium_button.is_over(pos):
                     difficulty = "Medium"
+                    animation = None
                     generate_puzzle(board, difficulty)
                 elif hard_button.is_over(pos):
                     difficulty = "Hard"
+                    animation = None
                     generate_puzzle(board, difficulty)
-                else:
+                elif animation is None:
                     row, col = get_mouse_pos(pos)
                     if row is not None and col is not None:
                         if original_board[row][col] == 0:
                             key = None
-            if event.type == pygame.KEYDOWN:
-                if row is not None and col is not None:
+            if event.type == pygame.KEYDOWN and animation is not None:
+                # Solve controls: pause, skip to the end, cancel and speed
+                if event.key == pygame.K_SPACE:
+                    animation.paused = not animation.paused
+                elif event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
+                    animation.skipping = True
+                elif event.key == pygame.K_ESCAPE:
+                    animation = None
+                    reset_board()
+                    print("Solve cancelled.")
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    animation.steps_per_frame *= 2
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    animation.steps_per_frame = max(1, animation.steps_per_frame // 2)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F1:
+                    give_hint()
+                elif event.key == pygame.K_F2:
+                    check_board()
+                elif row is not None and col is not None:
                     if original_board[row][col] == 0:
                         if event.key == pygame.K_1 or event.key == pygame.K_KP1:
                             key = 1
@@ -288,44 +401,75 @@ def main():
                             key = 8
                         elif event.key == pygame.K_9 or event.key == pygame.K_KP9:
                             key = 9
+                        elif event.unicode.upper() in LETTER_KEYS:
+                            key = LETTER_KEYS[event.unicode.upper()]
                         elif event.key == pygame.K_BACKSPACE or event.key == pygame.K_DELETE:
                             key = 0
                         if key is not None:
-                            if key == 0 or is_safe(board, row, col, key):
-                                board[row][col] = key
-                                solved_cells[row][col] = False
-                                key = None
-                            else:
-                                print("Invalid move!")
-        draw_window(WIN, board)
-        pygame.display.flip()
+                            enter_digit(row, col, key)
+                            key = None
+        if animation is not None and animation.advance():
+            if animation.solved:
+                solve_time = time.time() - animation.start_time
+                print(f"Solved successfully in {solve_time:.2f} seconds!")
+            elif animation.timed_out:
+                print(f"Gave up after {SKIP_TIMEOUT_S} seconds of searching.")
+            else:
+                print("Failed to solve.")
+            animation = None
+            tracker.load(board)
+        if animation is not None:
+            renderer.draw(board, animation.last_cell)
+        else:
+            renderer.draw(board, (row, col), tracker, wrong_cells)
+        if first_frame:
+            first_frame = False
+            now = time.perf_counter()
+            print(f"Started in {(now - START_TIME) * 1000:.0f} ms: imports {(imported - START_TIME) * 1000:.0f} ms, "
+                  f"window and fonts {(window_open - imported) * 1000:.0f} ms, "
+                  f"first frame {(now - window_open) * 1000:.0f} ms")
+    puzzle_pool.stop()  # Save the ready puzzles for the next run
     pygame.quit()
 
 if __name__ == "__main__":
     main()
 
 # Execution flow:
-# 1. Import necessary modules: pygame, random, and time.
-# 2. Initialize Pygame.
-# 3. Set up the window dimensions, colors, and fonts.
-# 4. Initialize the Sudoku board, original board, and solved_cells lists.
-# 5. Define difficulty levels for generating puzzles.
-# 6. Define a Button class to create clickable buttons.
-# 7. Create buttons for solving, generating easy, medium, and hard puzzles.
-# 8. Define functions for drawing the grid, board, and handling various game logic.
-# 9. Define the main game loop.
-# 10. Handle user input (mouse clicks and keyboard events).
-# 11. Draw the Sudoku board and buttons on the window.
+# 1. Import necessary modules: time, json, os and the pygame-free sudoku_core.
+# 2. Set up the window dimensions, colors and font settings.
+# 3. On launch, open_window() imports pygame, starts only its display and font
+#    modules and loads the fonts from the cached font path.
+# 4. Initialize the Sudoku board, original board and solved_cells buffers.
+# 5. Define a Button class to create clickable buttons.
+# 6. Create buttons for solving, generating easy, medium, and hard puzzles.
+# 7. Define functions for drawing the grid, board, and handling various game logic.
+#    Puzzle generation, the ConflictTracker and the solve_steps generator come from sudoku_core.
+# 8. Define the main game loop, capped at FPS frames per second.
+# 9. Handle user input (mouse clicks and keyboard events).
+# 10. Advance a running SolveAnimation by a few solver steps per frame.
+# 11. Let the BoardRenderer redraw only the cells that changed; the grid and
+#     buttons come from a cached background surface.
 # 12. Quit the game when the user closes the window.
 
 # Features:
 # - Generate Sudoku puzzles with different difficulty levels (Easy, Medium, Hard).
+# - Play 16x16 or 25x25 boards with SUDOKU_BOX=4 or SUDOKU_BOX=5; values above 9
+#   are shown and typed as letters.
 # - Solve the puzzle with animation, showing the step-by-step process.
+# - Pause (Space), skip to the end (Enter) or cancel (Esc) the animated solve;
+#   + and - change how many solver steps are shown per frame. Skipping gives up
+#   after SKIP_TIMEOUT_S seconds of search.
 # - Allow the user to input numbers manually.
-# - Validate user input and prevent invalid moves.
+# - Track conflicts as the user types: repeated digits and empty cells left
+#   without a candidate are highlighted at once, and the selected empty cell
+#   shows its remaining candidates.
+# - F1 fills in a hint and F2 checks the entered digits against the solution.
 # - Reset the board to the original state.
 # - Display the time taken to solve the puzzle.
 # - Provide visual feedback with colors and highlighting.
 # - Responsive window with clickable buttons.
+# - Fast start: pygame is imported only when the window opens and the font
+#   lookup is cached between runs; the startup times are printed after the
+#   first frame.
 
 # By reading the comments, you can understand the entire code flow, including the initialization, game loop, event handling, drawing functions, and the overall game logic. The comments also explain the purpose of each function and complex lines of code, making it easier to comprehend the codebase.
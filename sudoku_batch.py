@@ -0,0 +1,190 @@
+# Batch solving: spread many puzzles across a process pool.
+# Usage from code:
+#     from sudoku_batch import solve_many
+#     results = solve_many(puzzles, workers=4)
+#     results = solve_packed("puzzles.sdkp", workers=4)
+# Usage from the command line (one puzzle string per line, or a packed file
+# written by sudoku_packed.py):
+#     python sudoku_batch.py puzzles.txt --workers 4
+#     python sudoku_batch.py puzzles.sdkp --workers 4
+import argparse
+import multiprocessing
+import sys
+import time
+from sudoku_core import parse_puzzle, format_puzzle, solve
+from sudoku_packed import PackedPuzzles, is_packed
+
+# Packed files mapped by this process, by path; workers keep theirs open across chunks
+_packed_files = {}
+
+def _as_text(puzzle):
+    # Accept either a puzzle string or a board
+    if isinstance(puzzle, str):
+        return puzzle.strip()
+    return format_puzzle(puzzle)
+
+def _solve_one(job):
+    # Worker: solve one puzzle given as text and time it
+    text, strategy, backend, timeout, max_nodes = job
+    start = time.perf_counter()
+    try:
+        board = parse_puzzle(text)
+    except ValueError:
+        return {"puzzle": text, "solution": None, "status": "invalid", "nodes": 0, "seconds": 0.0}
+    return _solve_board(text, board, start, strategy, backend, timeout, max_nodes)
+
+def _solve_board(text, board, start, strategy, backend, timeout, max_nodes):
+    # Solve a decoded board and build its result dict; start is when decoding began
+    result = solve(board, strategy=strategy, backend=backend, timeout=timeout, max_nodes=max_nodes)
+    seconds = time.perf_counter() - start
+    return {
+        "puzzle": text,
+        "solution": format_puzzle(board) if result else None,
+        "status": result.status,
+        "nodes": result.nodes,
+        "seconds": seconds,
+    }
+
+def _solve_packed_range(job):
+    # Worker: solve puzzles start..stop-1 of a packed file, decoding each one
+    # from the mapped file only when its turn comes
+    path, start, stop, strategy, backend, timeout, max_nodes = job
+    puzzles = _packed_files.get(path)
+    if puzzles is None:
+        puzzles = _packed_files[path] = PackedPuzzles(path)
+    results = []
+    for i in range(start, stop):
+        began = time.perf_counter()
+        results.append(_solve_board(puzzles.text(i), puzzles.board(i), began, strategy, backend, timeout, max_nodes))
+    return results
+
+def _solve_chunk_vectorized(job):
+    # Worker: solve a chunk of puzzles with NumPy propagation across the whole chunk.
+    # Per-puzzle seconds are the chunk time split evenly over its 9x9 puzzles.
+    # Malformed lines are reported as "invalid" and larger boards go to the
+    # per-board solver, so neither stops the rest of the chunk.
+    texts, strategy, backend, timeout, max_nodes = job
+    import numpy as np  # NumPy is only needed in this mode
+    from sudoku_vector import solve_batch
+    results = [None] * len(texts)
+    batch = []  # (index, board) of the 9x9 puzzles
+    for i, text in enumerate(texts):
+        began = time.perf_counter()
+        try:
+            board = parse_puzzle(text)
+        except ValueError:
+            results[i] = {"puzzle": text, "solution": None, "status": "invalid", "nodes": 0, "seconds": 0.0}
+            continue
+        if len(board) == 9:
+            batch.append((i, board))
+        else:
+            results[i] = _solve_board(text, board, began, strategy, backend, timeout, max_nodes)
+    if batch:
+        start = time.perf_counter()
+        statuses = []
+        nodes = []
+        boards, solved = solve_batch(np.array([board for _, board in batch], dtype=np.uint8), strategy=strategy,
+                                     backend=backend, timeout=timeout, max_nodes=max_nodes,
+                                     statuses=statuses, nodes=nodes)
+        seconds = (time.perf_counter() - start) / len(batch)
+        for (i, _), board, ok, status, count in zip(batch, boards, solved, statuses, nodes):
+            results[i] = {
+                "puzzle": texts[i],
+                "solution": "".join(map(str, board.ravel())) if ok else None,
+                "status": status,
+                "nodes": count,
+                "seconds": seconds,
+            }
+    return results
+
+def solve_many(puzzles, workers=None, chunksize=None, strategy="mrv", backend="backtrack", vectorized=False,
+               timeout=None, max_nodes=None):
+    # Solve every puzzle and return one result dict per puzzle, in input order.
+    # Each result has the puzzle text, the solution text (None if not solved),
+    # the SolveResult status and the seconds spent on that puzzle. workers
+    # defaults to the CPU count; workers=1 solves in this process without starting a pool.
+    # timeout (seconds) and max_nodes limit each puzzle on its own: a puzzle that
+    # runs out gets status "timeout" and its worker moves on to the next one.
+    # vectorized=True propagates singles over each chunk as one NumPy array and
+    # only backtracks on the boards that are still open; larger boards are solved one by one.
+    texts = [_as_text(puzzle) for puzzle in puzzles]
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if chunksize is None:
+        # A few chunks per worker keeps the pool balanced without per-puzzle IPC
+        chunksize = max(1, len(texts) // (max(1, workers) * 4))
+    if vectorized:
+        jobs = [(texts[i:i + chunksize], strategy, backend, timeout, max_nodes) for i in range(0, len(texts), chunksize)]
+        if workers <= 1 or len(jobs) <= 1:
+            chunks = [_solve_chunk_vectorized(job) for job in jobs]
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                chunks = pool.map(_solve_chunk_vectorized, jobs, 1)
+        return [result for chunk in chunks for result in chunk]
+    jobs = [(text, strategy, backend, timeout, max_nodes) for text in texts]
+    if workers <= 1 or len(jobs) <= 1:
+        return [_solve_one(job) for job in jobs]
+    with multiprocessing.Pool(workers) as pool:
+        return list(pool.imap(_solve_one, jobs, chunksize))
+
+def solve_packed(path, workers=None, chunksize=None, strategy="mrv", backend="backtrack", timeout=None,
+                 max_nodes=None):
+    # Like solve_many, for a packed file: only index ranges are sent to the
+    # workers, and each worker maps the file itself and decodes its own range
+    with PackedPuzzles(path) as puzzles:
+        count = len(puzzles)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if chunksize is None:
+        chunksize = max(1, count // (max(1, workers) * 4))
+    jobs = [(path, i, min(i + chunksize, count), strategy, backend, timeout, max_nodes)
+            for i in range(0, count, chunksize)]
+    if workers <= 1 or len(jobs) <= 1:
+        chunks = [_solve_packed_range(job) for job in jobs]
+        for puzzles in _packed_files.values():
+            puzzles.close()
+        _packed_files.clear()
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            chunks = pool.map(_solve_packed_range, jobs, 1)
+    return [result for chunk in chunks for result in chunk]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a file of Sudoku puzzles in parallel.")
+    parser.add_argument("path", help="file with one puzzle per line ('0' or '.' for blanks), or a packed file")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-c", "--chunksize", type=int, default=None, help="puzzles per task sent to a worker")
+    parser.add_argument("--strategy", choices=["mrv", "first"], default="mrv")
+    parser.add_argument("--backend", choices=["backtrack", "dlx"], default="backtrack")
+    parser.add_argument("--vectorized", action="store_true", help="propagate singles per chunk with NumPy (9x9 only)")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS", help="give up on a puzzle after this long")
+    parser.add_argument("--max-nodes", type=int, default=None, help="give up on a puzzle after this many search nodes")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if is_packed(args.path) and not args.vectorized:
+        results = solve_packed(args.path, args.workers, args.chunksize, args.strategy, args.backend,
+                               args.timeout, args.max_nodes)
+    else:
+        if is_packed(args.path):
+            with PackedPuzzles(args.path) as packed:
+                puzzles = [packed.text(i) for i in range(len(packed))]
+        else:
+            with open(args.path) as f:
+                puzzles = [line.strip() for line in f if line.strip()]
+        start = time.perf_counter()
+        results = solve_many(puzzles, args.workers, args.chunksize, args.strategy, args.backend, args.vectorized,
+                             args.timeout, args.max_nodes)
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for result in results:
+        if result["solution"] is None:
+            failed += 1
+        print(f"{result['solution'] or result['status']} {result['seconds'] * 1000:.3f}ms")
+    print(f"Solved {len(results) - failed}/{len(results)} puzzles in {elapsed:.2f} seconds "
+          f"({len(results) / elapsed:.1f} puzzles/s)", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
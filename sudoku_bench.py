@@ -0,0 +1,281 @@
+# Reproducible solver and generator benchmark.
+# Runs every solver on the bundled corpora in puzzles/ and reports puzzles/sec,
+# p50/p99 latency, search counters (nodes, backtracks, candidate checks, max
+# depth) and peak traced memory, plus generation throughput per difficulty and
+# for bare solution grids.
+# --profile also prints the costliest puzzle of every run with its phase times. --json writes the results for later runs to
+# --compare against, so regressions show up between runs.
+#
+# Corpora (one 81-character puzzle per line):
+#   easy.txt  - 100 uniquely solvable puzzles from generate_puzzle ("Hard", seed 2024)
+#   hard.txt  - well-known hard puzzles (Easter Monster, AI Escargot and others)
+#   worst.txt - known worst cases for first-empty backtracking, including the
+#               17-clue anti-backtracking grid
+#
+# Usage:
+#     python sudoku_bench.py
+#     python sudoku_bench.py --solvers mrv dlx --corpus hard --json bench.json
+#     python sudoku_bench.py --compare bench.json
+#     python sudoku_bench.py --solvers first mrv --corpus worst --profile
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import sudoku_core
+from sudoku_core import SolveStats, is_safe, find_empty, parse_puzzle, copy_board, percentile
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzles")
+CORPORA = ["easy", "hard", "worst"]
+
+# Throughput drops by more than this fraction are reported as regressions
+REGRESSION_THRESHOLD = 0.10
+
+# Full grids timed per puzzle timed in the generation benchmark
+GRIDS_PER_PUZZLE = 100
+
+def legacy_solve(board, stats, depth=0):
+    # The original recursive solver that scans with is_safe on every candidate,
+    # counted like the bitmask search (checks are the is_safe calls)
+    stats.enter(depth)
+    empty = find_empty(board)
+    if not empty:
+        return True
+    row, col = empty
+    for num in range(1, 10):
+        stats.checks += 1
+        if is_safe(board, row, col, num):
+            board[row][col] = num
+            if legacy_solve(board, stats, depth + 1):
+                return True
+            board[row][col] = 0
+            stats.backtrack(row * 9 + col, num)
+    return False
+
+def animation_solve(board, stats):
+    # The search behind the animated solve in sudoku-V2.py with the display left
+    # out: drain solve_steps, counting every yielded step as a node and every
+    # removal as a backtrack
+    steps = sudoku_core.solve_steps(board)
+    while True:
+        try:
+            kind = next(steps)[0]
+        except StopIteration as finished:
+            return bool(finished.value)
+        stats.nodes += 1
+        if kind == "remove":
+            stats.backtracks += 1
+
+SOLVERS = {
+    "is_safe": legacy_solve,
+    "first": lambda board, stats: sudoku_core.solve(board, "first", stats),
+    "mrv": lambda board, stats: sudoku_core.solve(board, "mrv", stats),
+    "dlx": lambda board, stats: sudoku_core.solve(board, stats=stats, backend="dlx"),
+    "animation": animation_solve,
+}
+DEFAULT_SOLVERS = ["first", "mrv", "dlx", "animation"]
+
+# Combinations that take minutes and only run with --include-slow
+SLOW = {("is_safe", "hard"), ("is_safe", "worst"), ("first", "worst")}
+
+def load_corpus(name):
+    # Read a corpus file into a list of boards
+    with open(os.path.join(CORPUS_DIR, name + ".txt")) as f:
+        return [parse_puzzle(line) for line in f if line.strip()]
+
+def summarize(latencies, per_item, peak_bytes):
+    # Turn per-item latencies (seconds) and SolveStats.as_dict() counters into
+    # the reported metrics; per_item is None when there are no search counters
+    sorted_latencies = sorted(latencies)
+    total = sum(latencies)
+    entry = {
+        "count": len(latencies),
+        "total_s": total,
+        "per_s": len(latencies) / total if total else 0.0,
+        "p50_ms": percentile(sorted_latencies, 50) * 1000,
+        "p99_ms": percentile(sorted_latencies, 99) * 1000,
+        "nodes": None,
+        "peak_kib": peak_bytes / 1024 if peak_bytes is not None else None,
+    }
+    if per_item:
+        for key in ("nodes", "backtracks", "checks", "forced"):
+            entry[key] = sum(item[key] for item in per_item)
+        entry["max_depth"] = max(item["max_depth"] for item in per_item)
+        # The puzzle that took the longest, with its own counters and phase times
+        worst = max(range(len(latencies)), key=latencies.__getitem__)
+        entry["worst"] = dict(per_item[worst], index=worst, ms=latencies[worst] * 1000)
+    return entry
+
+def bench_solver(solver, puzzles, measure_memory=True):
+    # Time the solver on fresh copies of every puzzle; peak memory is measured in a
+    # separate pass because tracing allocations slows the search down
+    latencies = []
+    per_item = []
+    solutions = []
+    for puzzle in puzzles:
+        board = copy_board(puzzle)
+        stats = SolveStats()
+        start = time.perf_counter()
+        solved = solver(board, stats)
+        latencies.append(time.perf_counter() - start)
+        if not solved:
+            raise RuntimeError("Solver failed on a benchmark puzzle")
+        per_item.append(stats.as_dict())
+        solutions.append(board)
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+        for puzzle in puzzles:
+            solver(copy_board(puzzle), SolveStats())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return summarize(latencies, per_item, peak), solutions
+
+def check_large_boards():
+    # 16x16 and 25x25 cells can have more candidates than a 9x9 cell; make sure
+    # the search still fills an empty board and finds more than one solution
+    # for a sparse one before timing anything
+    for box in (4, 5):
+        board = sudoku_core.new_board(box)
+        if not sudoku_core.solve(board) or 0 in board.cells or not sudoku_core.SolverState(board).valid:
+            raise RuntimeError(f"mrv did not fill an empty {box * box}x{box * box} board")
+        sparse = sudoku_core.new_board(box)
+        sparse[0][0] = 1
+        if sudoku_core.count_solutions(sparse) != 2:
+            raise RuntimeError(f"count_solutions missed solutions of a sparse {box * box}x{box * box} board")
+
+def bench_generation(count, measure_memory=True):
+    # Time generate_puzzle for every difficulty with a fixed seed
+    results = {}
+    for difficulty in sudoku_core.difficulties:
+        random.seed(2024)
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            sudoku_core.generate_puzzle(sudoku_core.new_board(), difficulty)
+            latencies.append(time.perf_counter() - start)
+        peak = None
+        if measure_memory:
+            tracemalloc.start()
+            sudoku_core.generate_puzzle(sudoku_core.new_board(), difficulty)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results[difficulty] = summarize(latencies, None, peak)
+    # Full solution grids from the seeded GridGenerator, many per puzzle generated
+    generator = sudoku_core.GridGenerator(2024)
+    latencies = []
+    for _ in range(count * GRIDS_PER_PUZZLE):
+        start = time.perf_counter()
+        generator.next_cells()
+        latencies.append(time.perf_counter() - start)
+    results["full grid"] = summarize(latencies, None, None)
+    return results
+
+def compare(results, baseline):
+    # Print throughput changes against a previous --json run and return the
+    # number of regressions
+    print()
+    print("Compared with baseline:")
+    sections = [("solve", results["solve"], baseline.get("solve", {})),
+                ("generate", results["generate"], baseline.get("generate", {}))]
+    regressions = 0
+    for section, current, previous in sections:
+        for name, entry in current.items():
+            old = previous.get(name)
+            if not old or not old.get("per_s"):
+                continue
+            change = entry["per_s"] / old["per_s"] - 1
+            flag = ""
+            if change < -REGRESSION_THRESHOLD:
+                flag = "  REGRESSION"
+                regressions += 1
+            label = f"{section} {name}"
+            print(f"  {label:<30}{old['per_s']:>12.2f} -> {entry['per_s']:>10.2f}/s {change:>+8.1%}{flag}")
+    return regressions
+
+def print_table(title, rows):
+    # One line of metrics per benchmark entry
+    print(f"{title:<22}{'count':>7}{'per s':>11}{'p50 ms':>10}{'p99 ms':>10}{'nodes':>11}"
+          f"{'backtracks':>11}{'depth':>6}{'peak KiB':>10}")
+    for name, entry in rows.items():
+        nodes = "-" if entry["nodes"] is None else entry["nodes"]
+        backtracks = entry.get("backtracks", "-")
+        depth = entry.get("max_depth", "-")
+        peak = "-" if entry["peak_kib"] is None else f"{entry['peak_kib']:.0f}"
+        print(f"{name:<22}{entry['count']:>7}{entry['per_s']:>11.2f}{entry['p50_ms']:>10.3f}"
+              f"{entry['p99_ms']:>10.3f}{nodes:>11}{backtracks:>11}{depth:>6}{peak:>10}")
+
+def print_profile(rows):
+    # The slowest puzzle of every solve entry with its counters and phase times
+    print()
+    print("Slowest puzzle per run:")
+    for name, entry in rows.items():
+        worst = entry.get("worst")
+        if worst is None:
+            continue
+        phases = " ".join(f"{phase}={seconds * 1000:.2f}ms" for phase, seconds in sorted(worst["times"].items()))
+        print(f"  {name:<22} #{worst['index']:<4} {worst['ms']:>10.3f}ms  nodes={worst['nodes']} "
+              f"backtracks={worst['backtracks']} checks={worst['checks']} forced={worst['forced']} "
+              f"depth={worst['max_depth']} {phases}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solvers and generator.")
+    parser.add_argument("--solvers", nargs="+", choices=sorted(SOLVERS), default=DEFAULT_SOLVERS)
+    parser.add_argument("--corpus", nargs="+", choices=CORPORA, default=CORPORA)
+    parser.add_argument("--generate", type=int, default=50, metavar="N",
+                        help="puzzles generated per difficulty (0 to skip)")
+    parser.add_argument("--include-slow", action="store_true", help="also run solver/corpus pairs that take minutes")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory pass")
+    parser.add_argument("--profile", action="store_true", help="print the counters of the slowest puzzle per run")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a previous --json file")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "solve": {},
+        "generate": {},
+    }
+    check_large_boards()
+    for corpus in args.corpus:
+        puzzles = load_corpus(corpus)
+        reference = None
+        for name in args.solvers:
+            if (name, corpus) in SLOW and not args.include_slow:
+                continue
+            entry, solutions = bench_solver(SOLVERS[name], puzzles, not args.no_memory)
+            # Every corpus puzzle has one solution, so all solvers must agree
+            if reference is None:
+                reference = (name, solutions)
+            elif solutions != reference[1]:
+                raise RuntimeError(f"{name} disagrees with {reference[0]} on {corpus}")
+            results["solve"][f"{corpus}/{name}"] = entry
+    if args.generate > 0:
+        results["generate"] = bench_generation(args.generate, not args.no_memory)
+
+    print_table("solve", results["solve"])
+    if args.profile:
+        print_profile(results["solve"])
+    if results["generate"]:
+        print()
+        print_table("generate", results["generate"])
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
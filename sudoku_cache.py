@@ -0,0 +1,197 @@
+# Solution cache keyed by the canonical form of a puzzle.
+# Puzzles that differ only by a transposition, band/stack permutation, row/column
+# permutation inside a band/stack, or a relabelling of the digits share one
+# cache entry. The stored solution is mapped back to the caller's orientation
+# and digits on a hit. Entries are evicted least-recently-used.
+#
+# Canonical form: every row gets a key built from its clue counts per stack and every
+# band the sorted keys of its rows (columns and stacks likewise). These keys do not
+# change under the symmetries, so sorting by them and trying every order among
+# equal keys gives the same set of candidate grids for every puzzle in an orbit.
+# Each candidate has its digits relabelled by first appearance and the smallest
+# one is the canonical form. Symmetric clue layouts (and nearly full grids)
+# have too many ties to enumerate cheaply; those fall back to a key that only
+# removes the digit relabelling.
+import time
+from collections import OrderedDict
+from itertools import groupby, permutations, product
+from sudoku_core import SolveResult, solve
+
+# Most row-order x column-order candidates tried per orientation. Each costs a
+# few microseconds, so above this a lookup would cost more than a typical solve
+# and the puzzle takes the relabelling-only key instead.
+MAX_CANDIDATES = 32
+
+def _tied_orders(keys):
+    # Every index order that sorts keys, permuting only among equal keys
+    indices = sorted(range(len(keys)), key=keys.__getitem__)
+    if len(set(keys)) == len(keys):
+        return [indices]  # No ties: the sorted order is the only one
+    groups = [list(group) for _, group in groupby(indices, key=keys.__getitem__)]
+    return [[i for group in combo for i in group] for combo in product(*(permutations(group) for group in groups))]
+
+def _line_orders(grid):
+    # Candidate row orders for grid: bands sorted by band key, rows in a band by row key.
+    # None if there are more than MAX_CANDIDATES of them.
+    # A row's key pairs its clue count in each stack with the clue count of that
+    # stack inside the row's band, sorted so the stack order does not matter.
+    counts = [[(row[s] != 0) + (row[s + 1] != 0) + (row[s + 2] != 0) for s in (0, 3, 6)] for row in grid]
+    row_keys = []
+    for band in (0, 3, 6):
+        band_counts = [counts[band][s] + counts[band + 1][s] + counts[band + 2][s] for s in range(3)]
+        for r in range(band, band + 3):
+            row_keys.append(tuple(sorted(zip(counts[r], band_counts))))
+    band_keys = [tuple(sorted(row_keys[b:b + 3])) for b in (0, 3, 6)]
+    band_orders = _tied_orders(band_keys)
+    per_band = [[[band * 3 + k for k in order] for order in _tied_orders(row_keys[band * 3:band * 3 + 3])]
+                for band in range(3)]
+    if len(band_orders) * len(per_band[0]) * len(per_band[1]) * len(per_band[2]) > MAX_CANDIDATES:
+        return None  # Too many to enumerate; see canonical_form
+    orders = []
+    for band_order in band_orders:
+        for combo in product(*(per_band[band] for band in band_order)):
+            orders.append([row for part in combo for row in part])
+    return orders
+
+def _transpose(grid):
+    return [list(col) for col in zip(*grid)]
+
+def _relabelled(grid, row_order, col_order, best):
+    # The grid read in the given order with digits relabelled by first appearance,
+    # or None as soon as it is known to be larger than best
+    mapping = {}
+    out = []
+    for r in row_order:
+        row = grid[r]
+        for c in col_order:
+            num = row[c]
+            if num:
+                label = mapping.get(num)
+                if label is None:
+                    label = mapping[num] = len(mapping) + 1
+                num = label
+            if best is not None:
+                target = best[len(out)]
+                if num > target:
+                    return None
+                if num < target:
+                    best = None  # Already smaller; no need to compare further
+            out.append(num)
+    return out, mapping
+
+def canonical_form(board):
+    # Return (key, transform) for the board. key is an 81-character string equal
+    # for every puzzle in the same symmetry class; transform maps the board onto it.
+    # transform is (transposed, row_order, col_order, digit_mapping).
+    best = None
+    best_transform = None
+    columns = _transpose(board)
+    line_orders = _line_orders(board)
+    column_orders = _line_orders(columns)
+    fallback = (line_orders is None or column_orders is None
+                or len(line_orders) * len(column_orders) > MAX_CANDIDATES)
+    # The transposed grid's row orders are the board's column orders and vice versa
+    orientations = () if fallback else ((False, board, line_orders, column_orders),
+                                        (True, columns, column_orders, line_orders))
+    for transposed, grid, row_orders, col_orders in orientations:
+        for row_order in row_orders:
+            for col_order in col_orders:
+                result = _relabelled(grid, row_order, col_order, best)
+                if result is not None and (best is None or result[0] < best):
+                    best = result[0]
+                    best_transform = (transposed, row_order, col_order, result[1])
+    if fallback:
+        # Too many ties: only factor out the digit relabelling
+        identity = list(range(9))
+        cells, mapping = _relabelled(board, identity, identity, None)
+        return "r" + "".join(map(str, cells)), (False, identity, identity, mapping)
+    return "".join(map(str, best)), best_transform
+
+def _full_mapping(mapping):
+    # Extend a digit mapping to all nine digits: unused digits take the unused
+    # labels in increasing order (they are interchangeable in the puzzle)
+    mapping = dict(mapping)
+    free_labels = [label for label in range(1, 10) if label not in mapping.values()]
+    for num in range(1, 10):
+        if num not in mapping:
+            mapping[num] = free_labels.pop(0)
+    return mapping
+
+def to_canonical(solution, transform):
+    # Map a solution of the board into the canonical orientation and labels
+    transposed, row_order, col_order, mapping = transform
+    grid = _transpose(solution) if transposed else solution
+    mapping = _full_mapping(mapping)
+    return "".join(str(mapping[grid[r][c]]) for r in row_order for c in col_order)
+
+def from_canonical(text, transform):
+    # Map a canonical solution string back onto the board's orientation and digits
+    transposed, row_order, col_order, mapping = transform
+    inverse = {label: num for num, label in _full_mapping(mapping).items()}
+    grid = [[0] * 9 for _ in range(9)]
+    for i, r in enumerate(row_order):
+        for j, c in enumerate(col_order):
+            grid[r][c] = inverse[int(text[i * 9 + j])]
+    return _transpose(grid) if transposed else grid
+
+class SolutionCache:
+    # LRU cache of canonical puzzle -> canonical solution, or the status
+    # ("unsolvable" or "invalid") of puzzles without one. Timed-out and
+    # cancelled solves are not cached.
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def solve(self, board, **solve_options):
+        # Solve the board in place like sudoku_core.solve, skipping the search on a hit.
+        # Canonical forms are only defined for 9x9; other sizes go straight to the solver.
+        if len(board) != 9:
+            return solve(board, **solve_options)
+        start = time.perf_counter()
+        key, transform = canonical_form(board)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            text = self.entries[key]
+            if text == "unsolvable" or text == "invalid":
+                return SolveResult(text, 0, time.perf_counter() - start)
+            solution = from_canonical(text, transform)
+            for r in range(9):
+                board[r][:] = bytes(solution[r])  # Works for list rows and Board row views
+            return SolveResult("solved", 0, time.perf_counter() - start)
+        self.misses += 1
+        result = solve(board, **solve_options)
+        if result.status == "solved":
+            self.entries[key] = to_canonical(board, transform)
+        elif result.status == "unsolvable" or result.status == "invalid":
+            self.entries[key] = result.status
+        else:
+            return result  # Stopped early: nothing is known about this puzzle
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)  # Evict the least recently used entry
+        return result
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        # Hit/miss counters and current size
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+        }
+
+# Shared cache for cached_solve
+default_cache = SolutionCache()
+
+def cached_solve(board, **solve_options):
+    # sudoku_core.solve with the shared solution cache in front of it
+    return default_cache.solve(board, **solve_options)
@@ -0,0 +1,114 @@
+# Streaming command-line solver for line-oriented puzzle files.
+# Reads one puzzle per line ('0' or '.' for blanks; 81 characters for 9x9,
+# 256 or 625 for 16x16 or 25x25) from a file or stdin and writes one solution
+# per line as it goes, so memory stays constant however large the input is.
+# Unsolvable puzzles produce "unsolvable", puzzles over the --timeout or
+# --max-nodes limit produce "timeout" and malformed lines produce "invalid",
+# keeping output lines aligned with input.
+# Usage:
+#     python sudoku_cli.py puzzles.txt > solutions.txt
+#     cat puzzles.txt | python sudoku_cli.py --workers 4 > solutions.txt
+import argparse
+import itertools
+import multiprocessing
+import sys
+import time
+from sudoku_core import parse_puzzle, format_puzzle, solve
+from sudoku_cache import default_cache, cached_solve
+
+# Solved lines collected before each write to the output
+FLUSH_LINES = 4096
+
+def _solve_line(job):
+    # Solve one input line and return the output line
+    line, strategy, backend, use_cache, timeout, max_nodes = job
+    try:
+        board = parse_puzzle(line)
+    except ValueError:
+        return "invalid"
+    solver = cached_solve if use_cache else solve  # Each worker process has its own cache
+    result = solver(board, strategy=strategy, backend=backend, timeout=timeout, max_nodes=max_nodes)
+    if result.status == "solved":
+        return format_puzzle(board)
+    if result.status == "timeout":
+        return "timeout"
+    return "unsolvable"  # Givens that break a rule cannot be solved either
+
+def stream_solve(infile, outfile, workers=1, window=None, strategy="mrv", backend="backtrack", use_cache=False,
+                 timeout=None, max_nodes=None):
+    # Solve every non-blank line of infile into outfile and return the line counts.
+    # With workers > 1 the input is read in windows of at most window lines, so
+    # only one window is ever held in memory. use_cache puts the canonical-form
+    # solution cache in front of the solver so repeated puzzles skip the search.
+    # timeout (seconds) and max_nodes bound the search on each puzzle.
+    jobs = ((line, strategy, backend, use_cache, timeout, max_nodes) for line in infile if line.strip())
+    counts = {"solved": 0, "unsolvable": 0, "timeout": 0, "invalid": 0}
+    pending = []
+
+    def emit(out_line):
+        # Buffer output lines and write them in bulk
+        if out_line in counts:
+            counts[out_line] += 1
+        else:
+            counts["solved"] += 1
+        pending.append(out_line)
+        if len(pending) >= FLUSH_LINES:
+            outfile.write("\n".join(pending) + "\n")
+            pending.clear()
+
+    if workers <= 1:
+        for job in jobs:
+            emit(_solve_line(job))
+    else:
+        if window is None:
+            window = FLUSH_LINES * workers
+        chunksize = max(1, window // (workers * 4))
+        with multiprocessing.Pool(workers) as pool:
+            while True:
+                batch = list(itertools.islice(jobs, window))
+                if not batch:
+                    break
+                for out_line in pool.imap(_solve_line, batch, chunksize):
+                    emit(out_line)
+    if pending:
+        outfile.write("\n".join(pending) + "\n")
+    outfile.flush()
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Sudoku puzzles line by line.")
+    parser.add_argument("path", nargs="?", default="-", help="input file, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout (default)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--window", type=int, default=None, help="lines read ahead per batch when using workers")
+    parser.add_argument("--strategy", choices=["mrv", "first"], default="mrv")
+    parser.add_argument("--backend", choices=["backtrack", "dlx"], default="backtrack")
+    parser.add_argument("--cache", type=int, default=0, metavar="SIZE",
+                        help="cache solutions of up to SIZE canonical puzzles (default: off)")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS", help="give up on a puzzle after this long")
+    parser.add_argument("--max-nodes", type=int, default=None, help="give up on a puzzle after this many search nodes")
+    args = parser.parse_args(argv)
+
+    infile = sys.stdin if args.path == "-" else open(args.path)
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w", buffering=1 << 20)
+    default_cache.maxsize = args.cache
+    start = time.perf_counter()
+    try:
+        counts = stream_solve(infile, outfile, args.workers, args.window, args.strategy, args.backend, args.cache > 0,
+                              args.timeout, args.max_nodes)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"Solved {counts['solved']}/{total} puzzles ({counts['unsolvable']} unsolvable, "
+          f"{counts['timeout']} timed out, {counts['invalid']} invalid) in {elapsed:.2f} seconds", file=sys.stderr)
+    if args.cache > 0 and args.workers <= 1:
+        stats = default_cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%})", file=sys.stderr)
+    return 0 if counts["solved"] == total else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1089 @@
+# Pure-Python Sudoku solver and generator.
+# This module has no pygame dependency so it can be imported from worker
+# processes and display-less servers; the pygame scripts are thin clients on top of it.
+# Boards are Board objects (one flat buffer of cells) or plain lists of rows; every
+# function takes either. Besides the classic 9x9 (box size 3), every function
+# works on any box size n: a board of side n*n such as 16x16 (n=4) or 25x25 (n=5).
+import itertools
+import math
+import random
+import time
+
+# Difficulty levels (number of digits removed from a full 9x9 grid; larger
+# grids remove the same fraction of their cells)
+difficulties = {
+    "Easy": 20,
+    "Medium": 30,
+    "Hard": 40
+}
+
+# Characters for cell values in puzzle strings: 0 (blank), 1-9, then A-Z for 10 and up
+SYMBOLS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+VALUE_OF_SYMBOL = {ch: value for value, ch in enumerate(SYMBOLS)}
+VALUE_OF_SYMBOL.update({ch.lower(): value for value, ch in enumerate(SYMBOLS) if ch.isalpha()})
+VALUE_OF_SYMBOL["."] = 0
+# Cell value to the byte of its symbol, for formatting a whole buffer with bytes.translate
+_SYMBOL_BYTES = SYMBOLS.encode().ljust(256, b"?")
+
+class _BitCount:
+    # Stands in for a POPCOUNT table when the masks are too wide for one
+    def __getitem__(self, mask):
+        return bin(mask).count("1")
+
+class Geometry:
+    # Lookup tables for boards of a given box size, shared by every board of that size.
+    # Cells are numbered 0..ncells-1 in row-major order; digit d is bit (d - 1) of a mask.
+    def __init__(self, box):
+        size = box * box
+        self.box = box
+        self.size = size  # Side length and number of digits
+        self.ncells = size * size
+        self.row_of = [i // size for i in range(self.ncells)]
+        self.col_of = [i % size for i in range(self.ncells)]
+        self.box_of = [(i // (size * box)) * box + (i % size) // box for i in range(self.ncells)]
+        self.all_digits = (1 << size) - 1
+        self.digit_of_bit = {1 << (d - 1): d for d in range(1, size + 1)}
+        # A table up to 16 bits (64K entries); wider masks are counted on demand
+        self.popcount = [bin(mask).count("1") for mask in range(self.all_digits + 1)] if size <= 16 else _BitCount()
+        # The rows, columns and boxes as lists of cell indices
+        self.units = ([[r * size + c for c in range(size)] for r in range(size)] +
+                      [[r * size + c for r in range(size)] for c in range(size)] +
+                      [[i for i in range(self.ncells) if self.box_of[i] == b] for b in range(size)])
+        # The other cells of each cell's row, column and box
+        self.peers = []
+        for i in range(self.ncells):
+            peers = (set(self.units[self.row_of[i]]) | set(self.units[size + self.col_of[i]]) |
+                     set(self.units[2 * size + self.box_of[i]]))
+            peers.discard(i)
+            self.peers.append(sorted(peers))
+
+_geometries = {}
+
+def geometry(box=3):
+    # The Geometry for a box size, built on first use
+    geo = _geometries.get(box)
+    if geo is None:
+        if box < 2 or box * box >= len(SYMBOLS):
+            raise ValueError(f"Unsupported box size: {box}")
+        geo = _geometries[box] = Geometry(box)
+    return geo
+
+def geometry_of(board):
+    # The Geometry matching a board's side length
+    box = math.isqrt(len(board))
+    if box * box != len(board):
+        raise ValueError(f"Board side {len(board)} is not a square number")
+    return geometry(box)
+
+# Tables of the classic 9x9 board
+NINE = geometry(3)
+ROW_OF = NINE.row_of
+COL_OF = NINE.col_of
+BOX_OF = NINE.box_of
+ALL_DIGITS = NINE.all_digits
+
+class Board:
+    # A board stored as one bytearray of cells in row-major order, so cell (row, col)
+    # is cells[row * size + col]. board[row][col] still works like a list of rows
+    # (a row is a writable view into the cells), but copying, resetting, comparing
+    # and hashing a board each touch the single buffer instead of size lists.
+    __slots__ = ("box", "size", "cells")
+
+    def __init__(self, box=3, cells=None):
+        geo = geometry(box)
+        self.box = box
+        self.size = geo.size
+        self.cells = bytearray(geo.ncells) if cells is None else bytearray(cells)
+        if len(self.cells) != geo.ncells:
+            raise ValueError(f"Expected {geo.ncells} cells, got {len(self.cells)}")
+
+    @classmethod
+    def from_rows(cls, rows):
+        # A Board holding the same cells as a list-of-lists board
+        return cls(geometry_of(rows).box, [num for row in rows for num in row])
+
+    @classmethod
+    def from_text(cls, text):
+        # Parse a puzzle string like parse_puzzle, into a Board
+        return cls.from_rows(parse_puzzle(text))
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, row):
+        # Row views let board[row][col] read and write the cell
+        if not 0 <= row < self.size:
+            raise IndexError("Board row out of range")
+        start = row * self.size
+        return memoryview(self.cells)[start:start + self.size]
+
+    def __iter__(self):
+        cells = memoryview(self.cells)
+        for start in range(0, len(self.cells), self.size):
+            yield cells[start:start + self.size]
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.cells == other.cells and self.box == other.box
+        if isinstance(other, list):
+            return self.rows() == other
+        return NotImplemented
+
+    def __hash__(self):
+        # Hashes the current contents: a board must not change while it is a dict key
+        return hash(bytes(self.cells))
+
+    def __repr__(self):
+        return f"Board.from_text({format_puzzle(self)!r})"
+
+    def rows(self):
+        # The cells as a new list of row lists
+        cells, size = self.cells, self.size
+        return [list(cells[start:start + size]) for start in range(0, len(cells), size)]
+
+    def copy(self):
+        return Board(self.box, self.cells)
+
+    def snapshot(self):
+        # The cells as immutable bytes, for restore() or as a dict key
+        return bytes(self.cells)
+
+    def restore(self, snapshot):
+        # Overwrite every cell from a snapshot() (or another board's cells) in one copy
+        self.cells[:] = snapshot
+
+    def clear(self):
+        self.cells[:] = bytes(len(self.cells))
+
+class SolverState:
+    # Per-row, per-column and per-box masks of the digits already placed.
+    # place/unplace update the masks incrementally, so a legality check is one AND
+    # and the candidate set of a cell is one OR/NOT instead of an is_safe scan.
+    def __init__(self, board):
+        geo = geometry_of(board)
+        self.geo = geo
+        self.row_of, self.col_of, self.box_of = geo.row_of, geo.col_of, geo.box_of
+        self.all_digits = geo.all_digits
+        self.cells = list(board.cells) if isinstance(board, Board) else [num for row in board for num in row]
+        self.rows = [0] * geo.size
+        self.cols = [0] * geo.size
+        self.boxes = [0] * geo.size
+        self.valid = True  # False when the givens already break a rule
+        for i, num in enumerate(self.cells):
+            if num != 0:
+                if not 0 < num <= geo.size or not self.can_place(i, num):
+                    self.valid = False
+                    continue
+                bit = 1 << (num - 1)
+                self.rows[self.row_of[i]] |= bit
+                self.cols[self.col_of[i]] |= bit
+                self.boxes[self.box_of[i]] |= bit
+
+    def candidates(self, i):
+        # Mask of the digits that can still go in cell i
+        return self.all_digits & ~(self.rows[self.row_of[i]] | self.cols[self.col_of[i]] | self.boxes[self.box_of[i]])
+
+    def can_place(self, i, num):
+        # Check if num can be placed in cell i
+        return not (self.rows[self.row_of[i]] | self.cols[self.col_of[i]] | self.boxes[self.box_of[i]]) & (1 << (num - 1))
+
+    def place(self, i, num):
+        # Put num in cell i and mark it in the row, column and box masks
+        bit = 1 << (num - 1)
+        self.cells[i] = num
+        self.rows[self.row_of[i]] |= bit
+        self.cols[self.col_of[i]] |= bit
+        self.boxes[self.box_of[i]] |= bit
+
+    def unplace(self, i, num):
+        # Undo place(i, num)
+        bit = 1 << (num - 1)
+        self.cells[i] = 0
+        self.rows[self.row_of[i]] ^= bit
+        self.cols[self.col_of[i]] ^= bit
+        self.boxes[self.box_of[i]] ^= bit
+
+    def empty_cells(self):
+        # Flat indices of the cells that are still 0
+        return [i for i, num in enumerate(self.cells) if num == 0]
+
+    def write_to(self, board):
+        # Copy the cells back into a Board or a list-of-lists board
+        if isinstance(board, Board):
+            board.cells[:] = bytes(self.cells)
+            return
+        row_of, col_of = self.row_of, self.col_of
+        for i, num in enumerate(self.cells):
+            board[row_of[i]][col_of[i]] = num
+
+class ConflictTracker:
+    # Live constraint state of a board being edited by hand. It counts every
+    # digit in every row, column and box, so an edit changes a few counters and
+    # queries are lookups instead of is_safe scans. The cells in conflict (a digit
+    # repeated in one of their units) and the dead ends (empty cells without a
+    # candidate) are kept as sets, refreshed for the edited cell and its peers only.
+    def __init__(self, board):
+        self.load(board)
+
+    def load(self, board):
+        # Start over from the board's current cells
+        geo = geometry_of(board)
+        self.geo = geo
+        self.cells = list(board.cells) if isinstance(board, Board) else [num for row in board for num in row]
+        size = geo.size
+        # Units are numbered like geo.units: rows, then columns, then boxes
+        self.unit_of = [(geo.row_of[i], size + geo.col_of[i], 2 * size + geo.box_of[i]) for i in range(geo.ncells)]
+        self.counts = [[0] * (size + 1) for _ in range(3 * size)]
+        self.masks = [0] * (3 * size)  # Digits present in each unit
+        self.conflicts = set()
+        self.dead = set()
+        for i, num in enumerate(self.cells):
+            if num:
+                self._add(i, num)
+        for i in range(geo.ncells):
+            self._refresh(i)
+
+    def _add(self, i, num):
+        for unit in self.unit_of[i]:
+            self.counts[unit][num] += 1
+            self.masks[unit] |= 1 << (num - 1)
+
+    def _remove(self, i, num):
+        for unit in self.unit_of[i]:
+            self.counts[unit][num] -= 1
+            if self.counts[unit][num] == 0:
+                self.masks[unit] &= ~(1 << (num - 1))
+
+    def _refresh(self, i):
+        # Recompute whether cell i is in conflict or a dead end
+        num = self.cells[i]
+        if num:
+            self.dead.discard(i)
+            r, c, b = self.unit_of[i]
+            counts = self.counts
+            if counts[r][num] > 1 or counts[c][num] > 1 or counts[b][num] > 1:
+                self.conflicts.add(i)
+            else:
+                self.conflicts.discard(i)
+        else:
+            self.conflicts.discard(i)
+            if self.candidates_at(i):
+                self.dead.discard(i)
+            else:
+                self.dead.add(i)
+
+    def set(self, row, col, num):
+        # Record that cell (row, col) now holds num (0 to clear it)
+        i = row * self.geo.size + col
+        old = self.cells[i]
+        if old == num:
+            return
+        if old:
+            self._remove(i, old)
+        if num:
+            self._add(i, num)
+        self.cells[i] = num
+        self._refresh(i)
+        for j in self.geo.peers[i]:
+            self._refresh(j)
+
+    def candidates_at(self, i):
+        # Mask of the digits no peer of flat cell i holds
+        r, c, b = self.unit_of[i]
+        masks = self.masks
+        return self.geo.all_digits & ~(masks[r] | masks[c] | masks[b])
+
+    def candidates(self, row, col):
+        return self.candidates_at(row * self.geo.size + col)
+
+    def can_place(self, row, col, num):
+        # True if num in (row, col) would not repeat a digit of its row, column or box
+        i = row * self.geo.size + col
+        if self.cells[i] == num:
+            return i not in self.conflicts
+        r, c, b = self.unit_of[i]
+        masks = self.masks
+        return not (masks[r] | masks[c] | masks[b]) >> (num - 1) & 1
+
+    def hint(self):
+        # An empty cell with a single candidate, as (row, col, num), or None
+        size, digit_of_bit = self.geo.size, self.geo.digit_of_bit
+        for i, num in enumerate(self.cells):
+            if num == 0:
+                free = self.candidates_at(i)
+                if free and free & (free - 1) == 0:
+                    return i // size, i % size, digit_of_bit[free]
+        return None
+
+# Events a SolveStats hook can be registered for, with the arguments passed to it
+HOOK_EVENTS = {
+    "node": ("depth",),  # A search call at this guess depth
+    "place": ("cell", "num"),  # A guess (forced placements are not reported)
+    "backtrack": ("cell", "num"),  # A guess undone because its subtree failed
+    "solution": (),  # A complete grid was reached
+}
+
+class SolveStats:
+    # Optional search counters and trace hooks. Pass an instance as stats= to
+    # solve() or count_solutions(); with stats=None the search runs without any
+    # of this. Counters add up over every search the instance is passed to.
+    #   nodes      - search calls
+    #   backtracks - guesses undone because their subtree had no solution
+    #   checks     - candidate/legality checks (the bitmask stand-in for is_safe calls)
+    #   forced     - digits placed by singles propagation
+    #   max_depth  - deepest guess level reached
+    #   times      - seconds per phase: "setup", "search", "propagate" (part of search), "write"
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.checks = 0
+        self.forced = 0
+        self.max_depth = 0
+        self.times = {}
+        self.hooks = {}
+
+    def on(self, event, callback):
+        # Call callback on every event of this kind (see HOOK_EVENTS)
+        if event not in HOOK_EVENTS:
+            raise ValueError(f"Unknown event: {event}")
+        self.hooks.setdefault(event, []).append(callback)
+
+    def emit(self, event, *args):
+        for callback in self.hooks.get(event, ()):
+            callback(*args)
+
+    def enter(self, depth):
+        # Record a search node
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.hooks:
+            self.emit("node", depth)
+
+    def guess(self, cell, num):
+        if self.hooks:
+            self.emit("place", cell, num)
+
+    def backtrack(self, cell, num):
+        self.backtracks += 1
+        if self.hooks:
+            self.emit("backtrack", cell, num)
+
+    def solution(self):
+        if self.hooks:
+            self.emit("solution")
+
+    def add_time(self, phase, seconds):
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+
+    def as_dict(self):
+        # Plain counters for printing or JSON
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "checks": self.checks,
+            "forced": self.forced,
+            "max_depth": self.max_depth,
+            "times": dict(self.times),
+        }
+
+class _CountingState(SolverState):
+    # SolverState that counts every candidate and legality check into stats.
+    # Only used when stats are requested, so the plain search pays nothing for it.
+    def __init__(self, board, stats):
+        self.stats = stats
+        SolverState.__init__(self, board)
+
+    def candidates(self, i):
+        self.stats.checks += 1
+        return SolverState.candidates(self, i)
+
+    def can_place(self, i, num):
+        self.stats.checks += 1
+        return SolverState.can_place(self, i, num)
+
+class CancelToken:
+    # Shared flag for stopping a running solve from another thread: pass it as
+    # cancel= and call cancel(). The search polls it along with its deadline.
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class SolveResult:
+    # What solve() returns. It is true only when the board was solved, so it can
+    # be used like the old bool. status is one of:
+    #   "solved", "unsolvable", "invalid" (the givens break a rule),
+    #   "timeout" (the timeout or node budget ran out) or "cancelled".
+    # nodes and seconds describe the search so far; stats is the SolveStats
+    # passed in, if any, with the counters up to the point the search stopped.
+    def __init__(self, status, nodes=0, seconds=0.0, stats=None):
+        self.status = status
+        self.nodes = nodes
+        self.seconds = seconds
+        self.stats = stats
+
+    def __bool__(self):
+        return self.status == "solved"
+
+    def __repr__(self):
+        return f"SolveResult({self.status!r}, nodes={self.nodes}, seconds={self.seconds:.6f})"
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+def _expired(deadline, cancel):
+    # True once the deadline (a time.perf_counter() value) has passed or the token is cancelled
+    if cancel is not None and cancel.cancelled:
+        return True
+    return deadline is not None and time.perf_counter() >= deadline
+
+def _stop_status(cancel):
+    # Status of a search that was stopped before it finished
+    return "cancelled" if cancel is not None and cancel.cancelled else "timeout"
+
+def new_board(box=3):
+    # Create an empty Board (9x9 by default) filled with zeros
+    return Board(box)
+
+def copy_board(board):
+    # Return an independent copy of the board
+    if isinstance(board, Board):
+        return board.copy()
+    return [row[:] for row in board]
+
+def parse_puzzle(text):
+    # Parse a puzzle string with one character per cell ('0' or '.' for blanks,
+    # A-Z for values above 9) into a board. The length picks the size:
+    # 81 characters for 9x9, 256 for 16x16, 625 for 25x25.
+    text = text.strip()
+    size = math.isqrt(len(text))
+    box = math.isqrt(size)
+    if size * size != len(text) or box * box != size or box < 2:
+        raise ValueError(f"Expected 81, 256 or 625 characters, got {len(text)}")
+    try:
+        cells = [VALUE_OF_SYMBOL[ch] for ch in text]
+    except KeyError as error:
+        raise ValueError(f"Invalid cell character: {error.args[0]!r}") from None
+    if max(cells) > size:
+        raise ValueError(f"Cell value out of range for a {size}x{size} board")
+    return [cells[i:i + size] for i in range(0, len(cells), size)]
+
+def format_puzzle(board):
+    # Format a board as a string of one character per cell with '0' for blanks
+    if isinstance(board, Board):
+        return board.cells.translate(_SYMBOL_BYTES).decode()
+    return "".join(SYMBOLS[num] for row in board for num in row)
+
+def clear_board(board):
+    # Clear the Sudoku board by setting all values to 0
+    if isinstance(board, Board):
+        board.clear()
+        return
+    for row in board:
+        for j in range(len(row)):
+            row[j] = 0
+
+def generate_puzzle(board, difficulty, timeout=None):
+    # Generate a new Sudoku puzzle with the specified difficulty in place.
+    # timeout (seconds) bounds the digit removal; a puzzle that runs out keeps
+    # the digits it had not managed to remove, so it is still uniquely solvable
+    # but easier than asked.
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    clear_board(board)
+    if len(board) == 9:
+        fill_random(board)  # Fill the grid with a randomized search
+    else:
+        fill_pattern(board)  # random_grid only builds 9x9 grids
+    remove_digits(board, difficulty, deadline)  # Remove digits based on the difficulty level
+    return board
+
+def fill_pattern(board, rng=random):
+    # Fill an empty board with a random-looking full grid without searching: take
+    # the pattern grid where row r is the digits shifted by box * (r % box) + r // box,
+    # then shuffle its digits, bands, stacks and the rows and columns inside them.
+    # Every step keeps the grid valid.
+    box = geometry_of(board).box
+    size = box * box
+
+    def shuffled_lines():
+        # A random line order that keeps lines of the same band together
+        bands = rng.sample(range(box), box)
+        return [band * box + k for band in bands for k in rng.sample(range(box), box)]
+
+    rows = shuffled_lines()
+    cols = shuffled_lines()
+    digits = rng.sample(range(1, size + 1), size)
+    for i, r in enumerate(rows):
+        shift = box * (r % box) + r // box
+        line = board[i]
+        for j, c in enumerate(cols):
+            line[j] = digits[(shift + c) % size]
+
+def random_grid(rng=random):
+    # A random full 9x9 grid as a flat list of cells: backtracking in row-major
+    # order over the row, column and box masks, trying each cell's candidates in
+    # a random order, so no digit is preferred. A grid takes about 130
+    # placements on average.
+    row_of, col_of, box_of = ROW_OF, COL_OF, BOX_OF
+    rows = [0] * 9
+    cols = [0] * 9
+    boxes = [0] * 9
+    cells = [0] * 81
+    untried = [None] * 81  # Candidates of each cell on the current path still to try
+    shuffle = rng.shuffle
+    i = 0
+    while i < 81:
+        r, c, b = row_of[i], col_of[i], box_of[i]
+        options = untried[i]
+        if options is None:
+            free = ALL_DIGITS & ~(rows[r] | cols[c] | boxes[b])
+            options = untried[i] = [num for num in range(1, 10) if free >> (num - 1) & 1]
+            shuffle(options)
+        else:
+            # Back at this cell after a dead end further on: take its digit out again
+            bit = 1 << (cells[i] - 1)
+            rows[r] ^= bit
+            cols[c] ^= bit
+            boxes[b] ^= bit
+            cells[i] = 0
+        if not options:
+            untried[i] = None
+            i -= 1
+            continue
+        num = options.pop()
+        bit = 1 << (num - 1)
+        cells[i] = num
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        i += 1
+    return cells
+
+def fill_random(board, rng=random):
+    # Fill an empty 9x9 board with random_grid
+    cells = random_grid(rng)
+    if isinstance(board, Board):
+        board.cells[:] = bytes(cells)
+        return
+    for r in range(9):
+        board[r][:] = cells[r * 9:r * 9 + 9]
+
+# Grids GridGenerator derives from one searched grid before it searches a new one
+GRID_REFRESH = 64
+
+class GridGenerator:
+    # Stream of random full grids from a seeded RNG, for bulk generation.
+    # Searching every grid from scratch is too slow for that, so each grid is a
+    # random symmetry of a base grid: digits relabelled, bands, stacks and the
+    # rows and columns inside them shuffled, and a coin-flip transposition.
+    # Every symmetry keeps the grid valid. A new base grid comes from random_grid
+    # after every `refresh` grids, which mixes in fresh symmetry classes and keeps
+    # the stream close to uniform. Larger boxes start from the fill_pattern grid.
+    def __init__(self, seed=None, box=3, refresh=GRID_REFRESH):
+        self.rng = random.Random(seed)
+        self.geo = geometry(box)
+        self.refresh = refresh
+        self.base = None  # Cells of the current base grid as bytes
+        self.left = 0  # Grids still to derive from it
+        size = self.geo.size
+        self.perms = list(itertools.permutations(range(box)))  # Orders of the bands, or of the lines in a band
+        self.digits = list(range(1, size + 1))
+        self.relabel = bytearray(range(256))  # translate() table; entries 1..size are rewritten per grid
+
+    def _new_base(self):
+        if self.geo.box == 3:
+            return bytes(random_grid(self.rng))
+        board = Board(self.geo.box)
+        fill_pattern(board, self.rng)
+        return bytes(board.cells)
+
+    def _line_order(self):
+        # A random line order that keeps lines of the same band together
+        choice = self.rng.choice
+        perms = self.perms
+        box = self.geo.box
+        return [band * box + k for band in choice(perms) for k in choice(perms)]
+
+    def next_cells(self):
+        # The next grid as bytes of cells in row-major order
+        if self.left == 0:
+            self.base = self._new_base()
+            self.left = self.refresh
+        self.left -= 1
+        size = self.geo.size
+        rows = self._line_order()
+        cols = self._line_order()
+        if self.rng.random() < 0.5:
+            index = [r * size + c for r in rows for c in cols]
+        else:
+            index = [c * size + r for r in rows for c in cols]  # Transposed
+        self.rng.shuffle(self.digits)
+        self.relabel[1:size + 1] = bytes(self.digits)
+        return bytes(map(self.base.__getitem__, index)).translate(self.relabel)
+
+    def board(self):
+        # The next grid as a Board
+        return Board(self.geo.box, self.next_cells())
+
+    def __iter__(self):
+        while True:
+            yield self.board()
+
+def _singles_solve(state, trail, blanks):
+    # True if naked and hidden singles alone fill all blanks empty cells, which
+    # makes the solution unique without a search; the state is left unchanged
+    solved = propagate(state, trail) and len(trail) == blanks
+    undo(state, trail)
+    return solved
+
+def removal_count(difficulty, box=3):
+    # Digits to remove for a difficulty, scaled from 9x9 to the board's cell count
+    ncells = geometry(box).ncells
+    return round(difficulties[difficulty] * ncells / 81)
+
+def _unique(state, deadline):
+    # True if the state has exactly one solution, found before the deadline
+    search = Search(state, limit=2)
+    finished = search.run(deadline=deadline)
+    search.unwind()
+    return finished and search.found == 1
+
+def remove_digits(board, difficulty, deadline=None):
+    # Remove digits from the board based on the difficulty level, keeping only
+    # removals under which the puzzle still has exactly one solution.
+    # Returns the number of digits removed, which can fall short of the target
+    # if no further cell can be blanked without losing uniqueness, or if the
+    # deadline (a time.perf_counter() value) passes first.
+    state = SolverState(board)
+    count = removal_count(difficulty, state.geo.box)
+    filled = [i for i in range(state.geo.ncells) if state.cells[i] != 0]
+    random.shuffle(filled)  # Try the cells in random order
+    removed = 0
+    blanks = state.geo.ncells - len(filled)
+    trail = []
+    for i in filled:
+        if removed == count or (deadline is not None and time.perf_counter() >= deadline):
+            break
+        num = state.cells[i]
+        state.unplace(i, num)
+        # A digit that is the cell's only candidate is forced, so blanking it
+        # cannot add a solution, and neither can blanking it when singles alone
+        # still solve the puzzle; otherwise count, stopping at the second solution
+        if (state.candidates(i) == 1 << (num - 1) or _singles_solve(state, trail, blanks + removed + 1)
+                or _unique(state, deadline)):
+            board[state.row_of[i]][state.col_of[i]] = 0  # Remove the digit
+            removed += 1
+        else:
+            state.place(i, num)  # Keep the digit: removing it allows another solution
+    return removed
+
+def is_safe(board, row, col, num):
+    # Check if it's safe to place a number in a specific cell
+    size = len(board)
+    box = math.isqrt(size)
+    for x in range(size):
+        if board[row][x] == num or board[x][col] == num:  # Check row and column
+            return False
+    start_row, start_col = row - row % box, col - col % box  # Get the starting row and column of the box
+    for i in range(box):
+        for j in range(box):
+            if board[i + start_row][j + start_col] == num:  # Check the box
+                return False
+    return True
+
+def find_empty(board):
+    # Find the next empty cell in the Sudoku board
+    for i, row in enumerate(board):
+        for j, num in enumerate(row):
+            if num == 0:
+                return (i, j)
+    return None
+
+def solve(board, strategy="mrv", stats=None, backend="backtrack", timeout=None, max_nodes=None, cancel=None):
+    # Solve the Sudoku puzzle in place and return a SolveResult (true when solved).
+    # backend "backtrack" searches over the bitmask state: strategy "mrv" propagates
+    # singles and branches on the cell with the fewest candidates, "first" branches on
+    # the first empty cell in row-major order. backend "dlx" uses Dancing Links,
+    # "parallel" splits the backtracking search over a process pool (sudoku_parallel).
+    # stats is an optional SolveStats that collects counters, phase times and hooks.
+    # timeout (seconds), max_nodes and cancel (a CancelToken) stop the search early
+    # with status "timeout" or "cancelled"; the board is then left unchanged.
+    start = time.perf_counter()
+    deadline = None if timeout is None else start + timeout
+    if backend == "dlx":
+        from sudoku_dlx import dlx_solve  # Imported on first use to keep this module light
+        return dlx_solve(board, stats, deadline, max_nodes, cancel)
+    if backend == "parallel":
+        from sudoku_parallel import parallel_solve
+        return parallel_solve(board, strategy, stats, timeout, max_nodes, cancel)
+    if backend != "backtrack":
+        raise ValueError(f"Unknown backend: {backend}")
+    if stats is None:
+        search = Search(SolverState(board), strategy)
+        finished = search.run(max_nodes, deadline, cancel)
+        if search.found:
+            search.state.write_to(board)
+    else:
+        search = Search(_CountingState(board, stats), strategy, stats=stats)
+        setup_done = time.perf_counter()
+        stats.add_time("setup", setup_done - start)
+        finished = search.run(max_nodes, deadline, cancel)
+        search_done = time.perf_counter()
+        stats.add_time("search", search_done - setup_done)
+        if search.found:
+            search.state.write_to(board)
+            stats.add_time("write", time.perf_counter() - search_done)
+    if search.found:
+        status = "solved"
+    elif not search.state.valid:
+        status = "invalid"
+    elif finished:
+        status = "unsolvable"
+    else:
+        status = _stop_status(cancel)
+    return SolveResult(status, search.nodes, time.perf_counter() - start, stats)
+
+def count_solutions(board, limit=2, stats=None, backend="backtrack"):
+    # Count the solutions of the board without changing it, stopping at limit
+    if backend == "dlx":
+        from sudoku_dlx import dlx_count_solutions
+        return dlx_count_solutions(board, limit, stats)
+    if backend == "parallel":
+        from sudoku_parallel import parallel_count_solutions
+        return parallel_count_solutions(board, limit, stats)
+    if backend != "backtrack":
+        raise ValueError(f"Unknown backend: {backend}")
+    if stats is None:
+        return Search(SolverState(board), limit=limit).count()
+    start = time.perf_counter()
+    search = Search(_CountingState(board, stats), limit=limit, stats=stats)
+    setup_done = time.perf_counter()
+    stats.add_time("setup", setup_done - start)
+    found = search.count()
+    stats.add_time("search", time.perf_counter() - setup_done)
+    return found
+
+def propagate(state, trail):
+    # Place naked and hidden singles until none are left.
+    # Every placement is appended to trail so the caller can undo it.
+    # Returns False as soon as a cell or a unit has no way to be completed.
+    cells = state.cells
+    units, all_digits, digit_of_bit = state.geo.units, state.all_digits, state.geo.digit_of_bit
+    changed = True
+    while changed:
+        changed = False
+        # Naked singles: cells with exactly one candidate
+        for i in range(len(cells)):
+            if cells[i] == 0:
+                free = state.candidates(i)
+                if free == 0:
+                    return False
+                if free & (free - 1) == 0:
+                    state.place(i, digit_of_bit[free])
+                    trail.append(i)
+                    changed = True
+        # Hidden singles: digits that fit in only one cell of a unit
+        for unit in units:
+            placed = once = twice = 0
+            for i in unit:
+                num = cells[i]
+                if num != 0:
+                    placed |= 1 << (num - 1)
+                else:
+                    free = state.candidates(i)
+                    twice |= once & free
+                    once |= free
+            if (placed | once) != all_digits:
+                return False  # Some digit has nowhere to go in this unit
+            single = once & ~twice
+            while single:
+                bit = single & -single
+                single ^= bit
+                for i in unit:
+                    # Skip if an earlier placement in this pass took the cell or digit;
+                    # the next pass re-checks the unit
+                    if cells[i] == 0 and state.candidates(i) & bit:
+                        state.place(i, digit_of_bit[bit])
+                        trail.append(i)
+                        changed = True
+                        break
+    return True
+
+def undo(state, trail, mark=0):
+    # Remove the placements recorded in trail after its first mark entries
+    cells = state.cells
+    while len(trail) > mark:
+        i = trail.pop()
+        state.unplace(i, cells[i])
+
+def _propagate_timed(state, trail, stats):
+    # propagate() with its time and forced placements recorded in stats
+    start = time.perf_counter()
+    mark = len(trail)
+    consistent = propagate(state, trail)
+    stats.add_time("propagate", time.perf_counter() - start)
+    stats.forced += len(trail) - mark
+    return consistent
+
+class Search:
+    # Backtracking search over a SolverState with an explicit stack instead of
+    # recursion, so grid size is not bound by the recursion limit and the search
+    # can stop and pick up again where it left off.
+    # Every placement, forced or guessed, is appended to one trail and undone in
+    # place. For "mrv" the stack holds one frame per open guess:
+    #   [cell, untried candidates, trail length before the node, trail length before the guess, solutions so far]
+    # ("first" keeps the same information per depth, see _run_first.)
+    # strategy "mrv" propagates singles and guesses in the cell with the fewest
+    # candidates, "first" guesses in the first empty cell in row-major order.
+    # The search stops after limit solutions; the last one is left in the state.
+    def __init__(self, state, strategy="mrv", limit=1, stats=None):
+        if strategy not in ("mrv", "first"):
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.state = state
+        self.limit = limit
+        self.stats = stats
+        self.trail = []
+        self.stack = []
+        self.empties = None
+        if strategy == "first":
+            self.empties = state.empty_cells()  # Guess order
+            self.untried = [0] * len(self.empties)
+            self.found_at = [0] * len(self.empties)
+            self.depth = 0
+        self.found = 0  # Solutions found so far
+        self.nodes = 0
+        self.done = not state.valid
+        self.expand = state.valid  # True when the next step opens a new node
+
+    def run(self, max_nodes=None, deadline=None, cancel=None):
+        # Search until limit solutions are found or every branch is tried, and return
+        # True once finished. max_nodes, deadline (a time.perf_counter() value) and
+        # cancel (a CancelToken) suspend the search early and return False;
+        # calling run() again resumes it.
+        if self.done:
+            return True
+        budget = -1 if max_nodes is None else max_nodes
+        if self.empties is None:
+            finished = self._run_mrv(budget, deadline, cancel)
+        else:
+            finished = self._run_first(budget, deadline, cancel)
+        if finished:
+            self.done = True
+        return finished
+
+    def _run_mrv(self, budget, deadline, cancel):
+        # The search loop for strategy "mrv"; returns False if suspended.
+        # A node costs enough that the deadline and token are polled on every node.
+        state, trail, stack, stats = self.state, self.trail, self.stack, self.stats
+        cells, rows, cols, boxes = state.cells, state.rows, state.cols, state.boxes
+        geo = state.geo
+        row_of, col_of, box_of, digit_of_bit, popcount = geo.row_of, geo.col_of, geo.box_of, geo.digit_of_bit, geo.popcount
+        candidates = state.candidates
+        limit = self.limit
+        found, nodes, expand = self.found, self.nodes, self.expand
+        watch = deadline is not None or cancel is not None
+        finished = True
+        while True:
+            if expand:
+                if budget == 0 or (watch and _expired(deadline, cancel)):
+                    finished = False
+                    break
+                expand = False
+                nodes += 1
+                budget -= 1
+                mark = len(trail)
+                if stats is None:
+                    consistent = propagate(state, trail)
+                else:
+                    stats.enter(len(stack))
+                    consistent = _propagate_timed(state, trail, stats)
+                best = -1
+                if consistent:
+                    best_free = 0
+                    best_count = geo.size + 1
+                    for i in range(geo.ncells):
+                        if cells[i] == 0:
+                            free = candidates(i)
+                            count = popcount[free]
+                            if count < best_count:
+                                best, best_free, best_count = i, free, count
+                                if count == 2:
+                                    break  # Singles are already propagated, so 2 is the minimum
+                    if best < 0:
+                        # No empty cells left
+                        found += 1
+                        if stats is not None:
+                            stats.solution()
+                        if found >= limit:
+                            break
+                        consistent = False  # Keep counting: back out like a dead end
+                if consistent:
+                    stack.append([best, best_free, mark, len(trail), found])
+                else:
+                    while len(trail) > mark:
+                        i = trail.pop()
+                        bit = 1 << (cells[i] - 1)
+                        cells[i] = 0
+                        rows[row_of[i]] ^= bit
+                        cols[col_of[i]] ^= bit
+                        boxes[box_of[i]] ^= bit
+            if not stack:
+                break
+            # Undo the last guess of the innermost open frame and try its next candidate
+            frame = stack[-1]
+            cell, free, mark, guess_mark, found_before = frame
+            if len(trail) > guess_mark:
+                num = cells[cell]
+                while len(trail) > guess_mark:
+                    i = trail.pop()
+                    bit = 1 << (cells[i] - 1)
+                    cells[i] = 0
+                    rows[row_of[i]] ^= bit
+                    cols[col_of[i]] ^= bit
+                    boxes[box_of[i]] ^= bit
+                if stats is not None and found == found_before:
+                    stats.backtrack(cell, num)
+            if free:
+                bit = free & -free
+                frame[1] = free ^ bit
+                frame[4] = found
+                num = digit_of_bit[bit]
+                cells[cell] = num
+                rows[row_of[cell]] |= bit
+                cols[col_of[cell]] |= bit
+                boxes[box_of[cell]] |= bit
+                trail.append(cell)
+                if stats is not None:
+                    stats.guess(cell, num)
+                expand = True
+            else:
+                stack.pop()
+                while len(trail) > mark:
+                    i = trail.pop()
+                    bit = 1 << (cells[i] - 1)
+                    cells[i] = 0
+                    rows[row_of[i]] ^= bit
+                    cols[col_of[i]] ^= bit
+                    boxes[box_of[i]] ^= bit
+        self.found, self.nodes, self.expand = found, nodes, expand
+        return finished
+
+    def _run_first(self, budget, deadline, cancel):
+        # The search loop for strategy "first". Nothing is forced and the guess
+        # cells are known up front, so instead of frames it keeps the untried
+        # candidates and solution count per depth in preallocated lists, and the
+        # trail is rebuilt from the guessed cells when the loop stops. Nodes are
+        # cheap, so the deadline and token are polled every 64 nodes.
+        stats = self.stats
+        cells, rows, cols, boxes = self.state.cells, self.state.rows, self.state.cols, self.state.boxes
+        geo = self.state.geo
+        row_of, col_of, box_of, digit_of_bit, all_digits = geo.row_of, geo.col_of, geo.box_of, geo.digit_of_bit, geo.all_digits
+        empties, limit = self.empties, self.limit
+        total = len(empties)
+        untried, found_at = self.untried, self.found_at
+        found, nodes, expand, depth = self.found, self.nodes, self.expand, self.depth
+        watch = deadline is not None or cancel is not None
+        finished = True
+        while True:
+            if expand:
+                if budget == 0 or (watch and nodes & 63 == 0 and _expired(deadline, cancel)):
+                    finished = False
+                    break
+                expand = False
+                nodes += 1
+                budget -= 1
+                if stats is not None:
+                    stats.enter(depth)
+                if depth == total:
+                    found += 1
+                    if stats is not None:
+                        stats.solution()
+                    if found >= limit:
+                        break
+                else:
+                    i = empties[depth]
+                    if stats is not None:
+                        stats.checks += 1  # The candidate mask is computed inline
+                    untried[depth] = all_digits & ~(rows[row_of[i]] | cols[col_of[i]] | boxes[box_of[i]])
+                    depth += 1
+            if depth == 0:
+                break
+            d = depth - 1
+            i = empties[d]
+            num = cells[i]
+            if num:
+                # Undo the previous guess in this cell
+                bit = 1 << (num - 1)
+                cells[i] = 0
+                rows[row_of[i]] ^= bit
+                cols[col_of[i]] ^= bit
+                boxes[box_of[i]] ^= bit
+                if stats is not None and found == found_at[d]:
+                    stats.backtrack(i, num)
+            free = untried[d]
+            if free:
+                bit = free & -free
+                untried[d] = free ^ bit
+                found_at[d] = found
+                num = digit_of_bit[bit]
+                cells[i] = num
+                rows[row_of[i]] |= bit
+                cols[col_of[i]] |= bit
+                boxes[box_of[i]] |= bit
+                if stats is not None:
+                    stats.guess(i, num)
+                expand = True
+            else:
+                depth = d
+        self.found, self.nodes, self.expand, self.depth = found, nodes, expand, depth
+        self.trail[:] = [i for i in empties[:depth] if cells[i]]
+        return finished
+
+    def count(self):
+        # Run to the end and return the number of solutions found (at most limit),
+        # leaving the state as it was before the search
+        self.run()
+        self.unwind()
+        return self.found
+
+    def unwind(self):
+        # Undo every placement made by the search and drop its open frames
+        undo(self.state, self.trail)
+        self.stack.clear()
+        self.done = True
+
+    def placements(self):
+        # (cell, num) for every placement currently on the trail, in order
+        cells = self.state.cells
+        return [(i, cells[i]) for i in self.trail]
+
+def solve_steps(board, strategy="mrv"):
+    # Generator version of solve() for animation. The board is updated in place as
+    # the search moves and every change is yielded as ("place", row, col, num) or
+    # ("remove", row, col, 0). The generator returns True once the board is solved.
+    # The search runs one node at a time; the changes are the difference between
+    # the trail before and after the node.
+    search = Search(SolverState(board), strategy)
+    row_of, col_of = search.state.row_of, search.state.col_of
+    shown = []
+    while True:
+        finished = search.run(max_nodes=1)
+        current = search.placements()
+        keep = 0
+        while keep < len(shown) and keep < len(current) and shown[keep] == current[keep]:
+            keep += 1
+        for i, num in reversed(shown[keep:]):
+            board[row_of[i]][col_of[i]] = 0
+            yield ("remove", row_of[i], col_of[i], 0)
+        for i, num in current[keep:]:
+            board[row_of[i]][col_of[i]] = num
+            yield ("place", row_of[i], col_of[i], num)
+        shown = current
+        if finished:
+            return search.found > 0
@@ -0,0 +1,235 @@
+# Dancing Links (Knuth's Algorithm X) exact-cover backend for sudoku_core.
+# A Sudoku is an exact cover problem with 4 * cells constraint columns
+# (cell filled, row has digit, column has digit, box has digit) and
+# cells * digits candidate rows (one per cell and digit): 324 columns and
+# 729 rows for 9x9. The linked-list matrix for 9x9 is built once at import
+# time, other sizes on first use; every solve works on a cheap copy of it.
+import time
+from sudoku_core import NINE, SolveResult, geometry_of, _expired, _stop_status
+
+def matrix_row_columns(cell, num, geo=NINE):
+    # The four constraint columns covered by placing num in cell
+    d = num - 1
+    n = geo.ncells
+    return (cell,
+            n + geo.row_of[cell] * geo.size + d,
+            2 * n + geo.col_of[cell] * geo.size + d,
+            3 * n + geo.box_of[cell] * geo.size + d)
+
+def _build_template(geo=NINE):
+    # Build the node arrays: node 0 is the root, the next 4 * cells nodes are the
+    # column headers and every matrix row adds four nodes linked left/right.
+    columns = 4 * geo.ncells
+    rows = geo.ncells * geo.size
+    size = 1 + columns + rows * 4
+    left = [0] * size
+    right = [0] * size
+    up = list(range(size))
+    down = list(range(size))
+    column = [0] * size
+    row_of_node = [-1] * size
+    count = [0] * (columns + 1)
+    for h in range(columns + 1):
+        left[h] = h - 1 if h > 0 else columns
+        right[h] = h + 1 if h < columns else 0
+        column[h] = h
+    first_node = [0] * rows  # First node of each matrix row
+    node = columns + 1
+    for row in range(rows):
+        cell, num = divmod(row, geo.size)
+        first_node[row] = node
+        for k, col in enumerate(matrix_row_columns(cell, num + 1, geo)):
+            h = col + 1
+            column[node] = h
+            row_of_node[node] = row
+            # Append to the bottom of column h
+            up[node] = up[h]
+            down[node] = h
+            down[up[h]] = node
+            up[h] = node
+            count[h] += 1
+            # Link into the row ring
+            left[node] = node - 1 if k > 0 else node + 3
+            right[node] = node + 1 if k < 3 else node - 3
+            node += 1
+    return left, right, up, down, column, row_of_node, count, first_node
+
+# Precomputed once per board size and reused across puzzles
+TEMPLATE = _build_template()
+_templates = {NINE.box: TEMPLATE}
+
+def template(geo):
+    # The matrix template for a board size, built on first use
+    if geo.box not in _templates:
+        _templates[geo.box] = _build_template(geo)
+    return _templates[geo.box]
+
+class _Stopped(Exception):
+    # Unwinds the recursive search when a limit is reached
+    pass
+
+class DancingLinks:
+    # One exact-cover search over a private copy of the precomputed matrix
+    def __init__(self, board):
+        geo = geometry_of(board)
+        left, right, up, down, column, row_of_node, count, first_node = template(geo)
+        self.left = left[:]
+        self.right = right[:]
+        self.up = up[:]
+        self.down = down[:]
+        self.count = count[:]
+        self.column = column
+        self.row_of_node = row_of_node
+        self.geo = geo
+        self.solution = []  # Matrix rows chosen by the search
+        self.givens = []
+        self.valid = True
+        self.nodes = 0
+        self.limits = None  # (node budget, deadline, cancel token) when the search is limited
+        covered = set()
+        for cell in range(geo.ncells):
+            num = board[geo.row_of[cell]][geo.col_of[cell]]
+            if num == 0:
+                continue
+            if num > geo.size:
+                self.valid = False
+                return
+            row = cell * geo.size + num - 1
+            cols = matrix_row_columns(cell, num, geo)
+            if covered.intersection(cols):
+                self.valid = False  # Two givens claim the same constraint
+                return
+            covered.update(cols)
+            self.givens.append(row)
+            # Select the given's row: cover every column it touches
+            node = first_node[row]
+            for k in range(4):
+                self.cover(column[node + k])
+
+    def cover(self, h):
+        # Unlink column h and every row that uses it
+        left, right, up, down, column, count = self.left, self.right, self.up, self.down, self.column, self.count
+        right[left[h]] = right[h]
+        left[right[h]] = left[h]
+        i = down[h]
+        while i != h:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                count[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, h):
+        # Undo cover(h) in reverse order
+        left, right, up, down, column, count = self.left, self.right, self.up, self.down, self.column, self.count
+        i = up[h]
+        while i != h:
+            j = left[i]
+            while j != i:
+                count[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[h]] = h
+        left[right[h]] = h
+
+    def search(self, limit, stats=None, on_solution=None, depth=0):
+        # Count solutions up to limit; on_solution gets the chosen rows of each one.
+        # stats is an optional sudoku_core.SolveStats.
+        self.nodes += 1
+        if self.limits is not None:
+            max_nodes, deadline, cancel = self.limits
+            if (max_nodes is not None and self.nodes > max_nodes) or _expired(deadline, cancel):
+                raise _Stopped
+        if stats is not None:
+            stats.enter(depth)
+        right, down, count = self.right, self.down, self.count
+        if right[0] == 0:
+            if on_solution is not None:
+                on_solution(self.givens + self.solution)
+            if stats is not None:
+                stats.solution()
+            return 1
+        # Choose the column with the fewest remaining rows
+        h = right[0]
+        best, best_count = h, count[h]
+        while h != 0 and best_count > 1:
+            if count[h] < best_count:
+                best, best_count = h, count[h]
+            h = right[h]
+        if best_count == 0:
+            return 0
+        found = 0
+        self.cover(best)
+        i = down[best]
+        while i != best:
+            row = self.row_of_node[i]
+            self.solution.append(row)
+            if stats is not None:
+                stats.guess(row // self.geo.size, row % self.geo.size + 1)
+            j = right[i]
+            while j != i:
+                self.cover(self.column[j])
+                j = right[j]
+            sub = self.search(limit - found, stats, on_solution, depth + 1)
+            j = self.left[i]
+            while j != i:
+                self.uncover(self.column[j])
+                j = self.left[j]
+            self.solution.pop()
+            if stats is not None and sub == 0:
+                stats.backtrack(row // self.geo.size, row % self.geo.size + 1)
+            found += sub
+            if found >= limit:
+                break
+            i = down[i]
+        self.uncover(best)
+        return found
+
+def dlx_solve(board, stats=None, deadline=None, max_nodes=None, cancel=None):
+    # Solve the board in place with Dancing Links and return a SolveResult.
+    # deadline is a time.perf_counter() value; see sudoku_core.solve for the rest.
+    start = time.perf_counter()
+    dlx = DancingLinks(board)
+    if stats is not None:
+        setup_done = time.perf_counter()
+        stats.add_time("setup", setup_done - start)
+    if not dlx.valid:
+        return SolveResult("invalid", 0, time.perf_counter() - start, stats)
+    if max_nodes is not None or deadline is not None or cancel is not None:
+        dlx.limits = (max_nodes, deadline, cancel)
+    rows = []
+    try:
+        found = dlx.search(1, stats, rows.extend)
+    except _Stopped:
+        found = None
+    if stats is not None:
+        search_done = time.perf_counter()
+        stats.add_time("search", search_done - setup_done)
+    if not found:
+        status = "unsolvable" if found == 0 else _stop_status(cancel)
+        return SolveResult(status, dlx.nodes - (found is None), time.perf_counter() - start, stats)
+    geo = dlx.geo
+    for row in rows:
+        cell, num = divmod(row, geo.size)
+        board[geo.row_of[cell]][geo.col_of[cell]] = num + 1
+    if stats is not None:
+        stats.add_time("write", time.perf_counter() - search_done)
+    return SolveResult("solved", dlx.nodes, time.perf_counter() - start, stats)
+
+def dlx_count_solutions(board, limit=2, stats=None):
+    # Count the solutions of the board, stopping once limit is reached
+    start = time.perf_counter()
+    dlx = DancingLinks(board)
+    if stats is not None:
+        setup_done = time.perf_counter()
+        stats.add_time("setup", setup_done - start)
+    if not dlx.valid:
+        return 0
+    found = dlx.search(limit, stats)
+    if stats is not None:
+        stats.add_time("search", time.perf_counter() - setup_done)
+    return found
@@ -0,0 +1,311 @@
+# Human-style deduction engine and difficulty grader.
+# LogicSolver keeps a candidate mask per empty cell, seeded from the SolverState
+# row, column and box masks, and applies techniques cheapest first, going back
+# to the singles after every step that makes progress:
+#     level 1  naked and hidden singles
+#     level 2  locked candidates (pointing and claiming)
+#     level 3  naked and hidden pairs and triples
+#     level 4  X-wing and swordfish
+# A puzzle's grade is the level of the hardest technique it needed. Puzzles the
+# techniques cannot finish need search and are graded "Extreme".
+# Usage:
+#     python sudoku_logic.py puzzles.txt
+#     python sudoku_logic.py --generate 200
+import argparse
+import itertools
+import random
+import sys
+import time
+from collections import Counter
+from sudoku_core import SolverState, difficulties, generate_puzzle, new_board, parse_puzzle
+
+# Grade names by technique level; SEARCH_LEVEL is for puzzles deduction cannot finish
+GRADES = {1: "Easy", 2: "Medium", 3: "Hard", 4: "Expert", 5: "Extreme"}
+SEARCH_LEVEL = 5
+
+class _Tables:
+    # Per-geometry tables for the techniques, built on first use
+    def __init__(self, geo):
+        size = geo.size
+        units = geo.units
+        self.rows = units[:size]
+        self.cols = units[size:2 * size]
+        # Every box/line intersection as (shared cells, rest of the box, rest of the line)
+        self.intersections = []
+        for box_cells in units[2 * size:]:
+            for line_of, lines in ((geo.row_of, self.rows), (geo.col_of, self.cols)):
+                for line in sorted({line_of[i] for i in box_cells}):
+                    shared = [i for i in box_cells if line_of[i] == line]
+                    self.intersections.append((shared,
+                                               [i for i in box_cells if line_of[i] != line],
+                                               [i for i in lines[line] if i not in shared]))
+
+_tables = {}
+
+def _tables_for(geo):
+    tables = _tables.get(geo.box)
+    if tables is None:
+        tables = _tables[geo.box] = _Tables(geo)
+    return tables
+
+class LogicSolver:
+    # Solves a board by deduction only. run() fills self.cells as far as the
+    # techniques reach; used counts the steps each technique made, hardest is the
+    # level of the hardest one and broken is set when a contradiction shows up.
+    def __init__(self, board):
+        state = SolverState(board)
+        self.geo = state.geo
+        self.tables = _tables_for(state.geo)
+        self.cells = state.cells
+        self.cand = [state.candidates(i) if num == 0 else 0 for i, num in enumerate(state.cells)]
+        self.broken = not state.valid
+        self.used = Counter()
+        self.hardest = 0
+        self.hardest_technique = None
+        # Techniques in the order they are tried
+        self.techniques = [
+            ("naked single", 1, self.naked_singles),
+            ("hidden single", 1, self.hidden_singles),
+            ("locked candidates", 2, self.locked_candidates),
+            ("naked pair", 3, lambda: self.naked_subsets(2)),
+            ("hidden pair", 3, lambda: self.hidden_subsets(2)),
+            ("naked triple", 3, lambda: self.naked_subsets(3)),
+            ("hidden triple", 3, lambda: self.hidden_subsets(3)),
+            ("x-wing", 4, lambda: self.fish(2)),
+            ("swordfish", 4, lambda: self.fish(3)),
+        ]
+
+    def place(self, i, num):
+        # Fill cell i and remove num from the candidates of its peers
+        bit = 1 << (num - 1)
+        cand = self.cand
+        self.cells[i] = num
+        cand[i] = 0
+        for p in self.geo.peers[i]:
+            cand[p] &= ~bit
+
+    def eliminate(self, cells, mask):
+        # Remove the digits in mask from the candidates of cells; True if any were there
+        cand = self.cand
+        changed = False
+        for i in cells:
+            if cand[i] & mask:
+                cand[i] &= ~mask
+                changed = True
+        return changed
+
+    def run(self, max_level=SEARCH_LEVEL):
+        # Apply techniques up to max_level until the grid is full or none makes
+        # progress. Returns True if the grid was completed.
+        cells = self.cells
+        while not self.broken:
+            if 0 not in cells:
+                return True
+            for name, level, technique in self.techniques:
+                if level > max_level:
+                    return False
+                if technique():
+                    self.used[name] += 1
+                    if level > self.hardest:
+                        self.hardest = level
+                        self.hardest_technique = name
+                    break
+            else:
+                return False
+        return False
+
+    def naked_singles(self):
+        # Cells with one candidate left
+        cells, cand, digit_of_bit = self.cells, self.cand, self.geo.digit_of_bit
+        found = False
+        for i, num in enumerate(cells):
+            if num == 0:
+                free = cand[i]
+                if free == 0:
+                    self.broken = True
+                    return False
+                if free & (free - 1) == 0:
+                    self.place(i, digit_of_bit[free])
+                    found = True
+        return found
+
+    def hidden_singles(self):
+        # Digits with one place left in a row, column or box
+        cells, cand, digit_of_bit = self.cells, self.cand, self.geo.digit_of_bit
+        all_digits = self.geo.all_digits
+        found = False
+        for unit in self.geo.units:
+            placed = once = twice = 0
+            for i in unit:
+                num = cells[i]
+                if num:
+                    placed |= 1 << (num - 1)
+                else:
+                    twice |= once & cand[i]
+                    once |= cand[i]
+            if placed | once != all_digits:
+                self.broken = True  # Some digit has nowhere to go in this unit
+                return False
+            single = once & ~twice
+            while single:
+                bit = single & -single
+                single ^= bit
+                for i in unit:
+                    if cand[i] & bit:
+                        self.place(i, digit_of_bit[bit])
+                        found = True
+                        break
+        return found
+
+    def locked_candidates(self):
+        # A digit that a box only has in one line can go nowhere else in that line
+        # (pointing), and a digit that a line only has in one box can go nowhere
+        # else in that box (claiming)
+        cand = self.cand
+        found = False
+        for shared, box_rest, line_rest in self.tables.intersections:
+            here = 0
+            for i in shared:
+                here |= cand[i]
+            if not here:
+                continue
+            in_box = in_line = 0
+            for i in box_rest:
+                in_box |= cand[i]
+            for i in line_rest:
+                in_line |= cand[i]
+            if here & ~in_box & in_line:
+                found = self.eliminate(line_rest, here & ~in_box) or found
+            if here & ~in_line & in_box:
+                found = self.eliminate(box_rest, here & ~in_line) or found
+        return found
+
+    def naked_subsets(self, k):
+        # k cells of a unit whose candidates are only k digits: no other cell of
+        # the unit can have those digits
+        cand, popcount = self.cand, self.geo.popcount
+        found = False
+        for unit in self.geo.units:
+            empty = [i for i in unit if cand[i]]
+            if len(empty) <= k:
+                continue
+            small = [i for i in empty if popcount[cand[i]] <= k]
+            for group in itertools.combinations(small, k):
+                digits = 0
+                for i in group:
+                    digits |= cand[i]
+                if popcount[digits] == k:
+                    found = self.eliminate([i for i in empty if i not in group], digits) or found
+        return found
+
+    def hidden_subsets(self, k):
+        # k digits that fit in only the same k cells of a unit: those cells can
+        # have no other digit
+        cand, popcount = self.cand, self.geo.popcount
+        found = False
+        for unit in self.geo.units:
+            empty = [i for i in unit if cand[i]]
+            if len(empty) <= k:
+                continue
+            # Positions (bits over empty) of every digit still open in the unit
+            spots = {}
+            for j, i in enumerate(empty):
+                free = cand[i]
+                while free:
+                    bit = free & -free
+                    free ^= bit
+                    spots[bit] = spots.get(bit, 0) | (1 << j)
+            few = [bit for bit, where in spots.items() if popcount[where] <= k]
+            for group in itertools.combinations(few, k):
+                where = digits = 0
+                for bit in group:
+                    where |= spots[bit]
+                    digits |= bit
+                if popcount[where] == k:
+                    found = self.eliminate([i for j, i in enumerate(empty) if where >> j & 1], ~digits) or found
+        return found
+
+    def fish(self, n):
+        # X-wing (n=2) and swordfish (n=3): if a digit's places in n rows all lie
+        # in the same n columns, no other row can have it in those columns, and
+        # the same with rows and columns swapped
+        cand, popcount = self.cand, self.geo.popcount
+        tables = self.tables
+        found = False
+        for base, cover in ((tables.rows, tables.cols), (tables.cols, tables.rows)):
+            for d in range(self.geo.size):
+                bit = 1 << d
+                lines = []
+                for index, line in enumerate(base):
+                    where = 0
+                    for j, i in enumerate(line):
+                        if cand[i] & bit:
+                            where |= 1 << j
+                    if 2 <= popcount[where] <= n:
+                        lines.append((index, where))
+                for group in itertools.combinations(lines, n):
+                    where = 0
+                    for _, spots in group:
+                        where |= spots
+                    if popcount[where] != n:
+                        continue
+                    chosen = {index for index, _ in group}
+                    for j in range(len(cover)):
+                        if where >> j & 1:
+                            others = [i for k, i in enumerate(cover[j]) if k not in chosen]
+                            found = self.eliminate(others, bit) or found
+        return found
+
+def grade(board):
+    # Grade a puzzle by the hardest technique it needs.
+    # Returns (grade, technique): ("Invalid", None) if the givens break a rule or
+    # deduction hits a contradiction, ("Extreme", "search") if the techniques get stuck.
+    solver = LogicSolver(board)
+    solved = solver.run()
+    if solver.broken:
+        return "Invalid", None
+    if not solved:
+        return GRADES[SEARCH_LEVEL], "search"
+    return GRADES[max(1, solver.hardest)], solver.hardest_technique
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade Sudoku puzzles by the techniques they need.")
+    parser.add_argument("path", nargs="?", help="file with one puzzle per line")
+    parser.add_argument("--generate", type=int, default=0, metavar="N",
+                        help="grade N freshly generated puzzles per difficulty instead")
+    parser.add_argument("--seed", type=int, default=None, help="seed for --generate")
+    args = parser.parse_args(argv)
+    if args.path is None and not args.generate:
+        parser.error("give a puzzle file or --generate N")
+
+    start = time.perf_counter()
+    total = 0
+    if args.path is not None:
+        counts = Counter()
+        with open(args.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    level, technique = grade(parse_puzzle(line))
+                except ValueError:
+                    level, technique = "Invalid", None
+                counts[level] += 1
+                total += 1
+                print(f"{level} {technique or '-'}")
+        print(" ".join(f"{level}={counts[level]}" for level in list(GRADES.values()) + ["Invalid"] if counts[level]),
+              file=sys.stderr)
+    else:
+        random.seed(args.seed)
+        for difficulty in difficulties:
+            counts = Counter()
+            for _ in range(args.generate):
+                counts[grade(generate_puzzle(new_board(), difficulty))[0]] += 1
+                total += 1
+            print(f"{difficulty:<8}" + " ".join(f"{level}={counts[level]}" for level in GRADES.values() if counts[level]))
+    elapsed = time.perf_counter() - start
+    print(f"Graded {total} puzzles in {elapsed:.2f} seconds", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
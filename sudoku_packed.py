@@ -0,0 +1,223 @@
+# Packed binary puzzle files, read through mmap.
+# A file is a 16-byte header followed by fixed-size records, one per puzzle:
+#
+#     magic "SDKP" | version (1 byte) | box size (1 byte) | record size (2 bytes) | count (8 bytes)
+#
+# All integers are little-endian. Each record holds the cells in row-major order
+# with the fewest bits that fit a value (4 bits for 9x9, so 41 bytes per puzzle;
+# 5 bits for 16x16 and 25x25), big-endian and zero-padded to a whole byte.
+# Records have a fixed size, so puzzle i starts at 16 + i * record size and no
+# offset index is needed. Readers map the file and decode a record only when it
+# is asked for. A 4-bit record is exactly the hex form of the 81-character text
+# plus one padding digit, which makes 9x9 conversion cheap both ways.
+# Usage:
+#     python sudoku_packed.py pack puzzles.txt puzzles.sdkp
+#     python sudoku_packed.py unpack puzzles.sdkp puzzles.txt
+#     python sudoku_packed.py info puzzles.sdkp
+import argparse
+import mmap
+import struct
+import sys
+from sudoku_core import format_puzzle, geometry, parse_puzzle
+
+MAGIC = b"SDKP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQ")
+
+# Maps the ASCII hex digits of a 4-bit record to their values, for bytes.translate
+_HEX_VALUES = bytes(int(chr(byte), 16) if chr(byte) in "0123456789abcdef" else 0 for byte in range(256))
+
+def bits_per_cell(box):
+    # Bits needed for a cell value 0..box*box
+    return (box * box).bit_length()
+
+def record_size(box):
+    return (geometry(box).ncells * bits_per_cell(box) + 7) // 8
+
+def encode(cells, box=3):
+    # Pack a flat list of cell values into one record
+    bits = bits_per_cell(box)
+    if bits == 4:
+        return bytes.fromhex("".join(map(str, cells)) + "0" * (len(cells) % 2))
+    value = 0
+    for num in cells:
+        value = (value << bits) | num
+    size = record_size(box)
+    return (value << (size * 8 - len(cells) * bits)).to_bytes(size, "big")
+
+def decode(record, box=3):
+    # Unpack one record into a flat list of cell values
+    ncells = geometry(box).ncells
+    bits = bits_per_cell(box)
+    if bits == 4:
+        return list(record.hex().encode()[:ncells].translate(_HEX_VALUES))
+    value = int.from_bytes(record, "big") >> (len(record) * 8 - ncells * bits)
+    mask = (1 << bits) - 1
+    return [(value >> (bits * (ncells - 1 - k))) & mask for k in range(ncells)]
+
+def _check_size(cells, box):
+    # Raise if a puzzle does not have the cell count of the file's board size
+    ncells = geometry(box).ncells
+    if len(cells) != ncells:
+        size = box * box
+        raise ValueError(f"Puzzle has {len(cells)} cells but this file holds {size}x{size} boards ({ncells} cells)")
+
+def _record_of_text(text, box):
+    # Validate a puzzle string and pack it; 9x9 strings go straight through hex
+    if box == 3:
+        digits = text.strip().replace(".", "0")
+        if len(digits) == 81 and digits.isdigit():
+            return bytes.fromhex(digits + "0")
+    cells = [num for row in parse_puzzle(text) for num in row]
+    _check_size(cells, box)
+    return encode(cells, box)
+
+class PackedWriter:
+    # Appends puzzles to a new packed file; the count in the header is written on close()
+    def __init__(self, path, box=3):
+        self.box = box
+        self.count = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, box, record_size(box), 0))
+
+    def write(self, puzzle):
+        # Add a puzzle given as a string or a board
+        if isinstance(puzzle, str):
+            record = _record_of_text(puzzle, self.box)
+        else:
+            cells = [num for row in puzzle for num in row]
+            _check_size(cells, self.box)
+            record = encode(cells, self.box)
+        self.file.write(record)
+        self.count += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.box, record_size(self.box), self.count))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class PackedPuzzles:
+    # Read-only view of a packed file. Indexing decodes one puzzle from the
+    # mapped file; nothing else is read into Python objects.
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            self.map.close()
+            raise ValueError(f"{path} is too short for a packed puzzle file")
+        magic, version, box, size, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a packed puzzle file (version {VERSION})")
+        if size != record_size(box) or len(self.map) < HEADER.size + count * size:
+            self.map.close()
+            raise ValueError(f"{path} is truncated or has a bad header")
+        self.box = box
+        self.record_size = size
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def record(self, i):
+        # The raw bytes of puzzle i
+        if not 0 <= i < self.count:
+            raise IndexError(f"Puzzle index {i} out of range")
+        start = HEADER.size + i * self.record_size
+        return self.map[start:start + self.record_size]
+
+    def cells(self, i):
+        # Puzzle i as a flat list of cell values
+        return decode(self.record(i), self.box)
+
+    def board(self, i):
+        # Puzzle i as a list-of-lists board
+        cells = self.cells(i)
+        size = self.box * self.box
+        return [cells[k:k + size] for k in range(0, len(cells), size)]
+
+    def text(self, i):
+        # Puzzle i as a puzzle string
+        if self.box == 3:
+            return self.record(i).hex()[:81]
+        return format_puzzle(self.board(i))
+
+    def __getitem__(self, i):
+        return self.board(i)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.board(i)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def is_packed(path):
+    # True if the file starts with the packed-file magic
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def pack_text(src, dst, box=3):
+    # Convert a text file with one puzzle per line into a packed file; returns the count
+    with open(src) as infile, PackedWriter(dst, box) as writer:
+        for number, line in enumerate(infile, 1):
+            if not line.strip():
+                continue
+            try:
+                writer.write(line)
+            except ValueError as error:
+                raise ValueError(f"{src}, line {number}: {error}") from None
+    return writer.count
+
+def unpack_text(src, dst):
+    # Convert a packed file back into one puzzle string per line; returns the count
+    with PackedPuzzles(src) as puzzles, open(dst, "w") as outfile:
+        for i in range(len(puzzles)):
+            outfile.write(puzzles.text(i) + "\n")
+        return len(puzzles)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert between puzzle text files and packed binary files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="text (one puzzle per line) to packed")
+    pack.add_argument("src")
+    pack.add_argument("dst")
+    pack.add_argument("--box", type=int, default=3, help="box size: 3 for 9x9 (default), 4 for 16x16, 5 for 25x25")
+    unpack = commands.add_parser("unpack", help="packed to text")
+    unpack.add_argument("src")
+    unpack.add_argument("dst")
+    info = commands.add_parser("info", help="print the header of a packed file")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        count = pack_text(args.src, args.dst, args.box)
+        print(f"Packed {count} puzzles into {args.dst}", file=sys.stderr)
+    elif args.command == "unpack":
+        count = unpack_text(args.src, args.dst)
+        print(f"Unpacked {count} puzzles into {args.dst}", file=sys.stderr)
+    else:
+        with PackedPuzzles(args.path) as puzzles:
+            size = puzzles.box * puzzles.box
+            print(f"{len(puzzles)} puzzles, {size}x{size}, {puzzles.record_size} bytes each")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
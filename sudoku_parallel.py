@@ -0,0 +1,236 @@
+# Parallel search for single hard puzzles.
+# The search tree is split at its first few branch points into subproblems (the
+# puzzle with those guesses filled in) and the subproblems are handed to a process
+# pool one at a time from a shared queue, so a worker that finishes a small
+# subtree takes the next one while others are still busy with large ones. There
+# are several times more subproblems than workers, which keeps every core busy
+# until the end however uneven the subtrees are.
+# All workers watch one shared stop flag. It is raised as soon as a solution
+# comes back (or, when counting, once limit solutions have), at the deadline or
+# when the caller's token is cancelled; running searches then stop at their next
+# poll and queued subproblems return without searching.
+# Usage:
+#     python sudoku_parallel.py puzzles/worst.txt --workers 1 2 4 --strategy first
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from sudoku_core import Board, Search, SolveResult, SolverState, _expired, _stop_status, geometry_of, parse_puzzle, propagate
+
+# Subproblems per worker made by the split
+PARTS_PER_WORKER = 8
+# Seconds between checks of the deadline and cancel token while waiting for results
+POLL_S = 0.01
+
+class _StopFlag:
+    # Cancel token over a shared byte, readable by every process in the pool
+    def __init__(self, value):
+        self.value = value
+
+    @property
+    def cancelled(self):
+        return self.value.value != 0
+
+_stop = None
+
+def _init_worker(value):
+    global _stop
+    _stop = _StopFlag(value)
+
+def _search_part(job):
+    # Search one subproblem in a worker.
+    # Returns (solutions found, solved cells or None, nodes, True if the subtree was searched to the end).
+    cells, box, strategy, limit, max_nodes = job
+    if _stop.cancelled:
+        return 0, None, 0, False
+    state = SolverState(Board(box, cells))
+    search = Search(state, strategy, limit)
+    finished = search.run(max_nodes, cancel=_stop)
+    solution = bytes(state.cells) if search.found and limit == 1 else None
+    return search.found, solution, search.nodes, finished
+
+def _branch_cell(state, strategy):
+    # The cell the sequential search would guess in next, or None if the grid is full
+    best, best_count = None, None
+    popcount = state.geo.popcount
+    for i, num in enumerate(state.cells):
+        if num == 0:
+            if strategy == "first":
+                return i
+            count = popcount[state.candidates(i)]
+            if best is None or count < best_count:
+                best, best_count = i, count
+                if count <= 1:
+                    break
+    return best
+
+def split(board, target, strategy="mrv"):
+    # Expand the search tree breadth first until there are at least target open
+    # subproblems or nothing is left to expand. Returns the subproblems as flat
+    # cell lists in the order the sequential search would visit them; branches
+    # that break a rule are dropped and solved grids are kept as they are.
+    # "mrv" propagates singles and branches on the cell with the fewest candidates,
+    # "first" branches on the first empty cell, as the search does.
+    state = SolverState(board)
+    if not state.valid:
+        return []
+    box = state.geo.box
+    parts = [state.cells]
+    while len(parts) < target:
+        expanded = []
+        for cells in parts:
+            state = SolverState(Board(box, cells))
+            if strategy == "mrv" and not propagate(state, []):
+                continue
+            i = _branch_cell(state, strategy)
+            if i is None:
+                expanded.append(list(state.cells))
+                continue
+            free = state.candidates(i)
+            while free:
+                bit = free & -free
+                free ^= bit
+                child = list(state.cells)
+                child[i] = state.geo.digit_of_bit[bit]
+                expanded.append(child)
+        if not expanded or expanded == parts:
+            return expanded  # Every branch is dead or a solved grid
+        parts = expanded
+    return parts
+
+class ParallelSolver:
+    # A process pool kept between calls, since starting one costs far more than an
+    # easy search. Use it as a context manager or call close() when done.
+    def __init__(self, workers=None, parts_per_worker=PARTS_PER_WORKER):
+        self.workers = workers or os.cpu_count() or 1
+        self.parts_per_worker = parts_per_worker
+        self.flag = multiprocessing.RawValue("b", 0)
+        self.pool = multiprocessing.Pool(self.workers, _init_worker, (self.flag,))
+
+    def _run(self, board, strategy, limit, timeout, max_nodes, cancel, stats, on_result):
+        # Split the board and search the parts until on_result(found, solution)
+        # returns True. Returns (status, nodes): status is "done" once on_result
+        # said so, "timeout" or "cancelled" if stopped, "unsolvable" if every part
+        # was searched to the end and None if a part ran out of max_nodes.
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        parts = split(board, self.workers * self.parts_per_worker, strategy)
+        if stats is not None:
+            split_done = time.perf_counter()
+            stats.add_time("setup", split_done - start)
+        box = geometry_of(board).box
+        self.flag.value = 0
+        results = self.pool.imap_unordered(_search_part,
+                                           [(bytes(cells), box, strategy, limit, max_nodes) for cells in parts])
+        status = None
+        nodes = 0
+        remaining = len(parts)
+        exhausted = True
+        while remaining:
+            if status is None and _expired(deadline, cancel):
+                status = _stop_status(cancel)
+                self.flag.value = 1
+            try:
+                found, solution, part_nodes, finished = results.next(POLL_S)
+            except multiprocessing.TimeoutError:
+                continue
+            remaining -= 1
+            nodes += part_nodes
+            exhausted = exhausted and finished
+            if status is None and on_result(found, solution):
+                status = "done"
+                self.flag.value = 1  # Stop the other workers; the loop drains what they return
+        if stats is not None:
+            stats.nodes += nodes
+            stats.add_time("search", time.perf_counter() - split_done)
+        if status is None and exhausted:
+            status = "unsolvable"
+        return status, nodes
+
+    def solve(self, board, strategy="mrv", timeout=None, max_nodes=None, cancel=None, stats=None):
+        # Solve the board in place like sudoku_core.solve and return a SolveResult.
+        # max_nodes bounds the search of each subproblem, not the total.
+        start = time.perf_counter()
+        if not SolverState(board).valid:
+            return SolveResult("invalid", 0, time.perf_counter() - start, stats)
+        solutions = []
+
+        def on_result(found, solution):
+            if found:
+                solutions.append(solution)
+            return bool(found)
+
+        status, nodes = self._run(board, strategy, 1, timeout, max_nodes, cancel, stats, on_result)
+        if solutions:
+            state = SolverState(Board(geometry_of(board).box, solutions[0]))
+            state.write_to(board)
+            status = "solved"
+        elif status is None:
+            status = "timeout"  # Some part ran out of max_nodes
+        return SolveResult(status, nodes, time.perf_counter() - start, stats)
+
+    def count_solutions(self, board, limit=2, stats=None):
+        # Count the solutions of the board without changing it, stopping at limit
+        if not SolverState(board).valid:
+            return 0
+        total = [0]
+
+        def on_result(found, solution):
+            total[0] += found
+            return total[0] >= limit
+
+        self._run(board, "mrv", limit, None, None, None, stats, on_result)
+        return min(total[0], limit)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+_default_solver = None
+
+def default_solver():
+    # A shared ParallelSolver with one worker per core, started on first use
+    global _default_solver
+    if _default_solver is None:
+        _default_solver = ParallelSolver()
+    return _default_solver
+
+def parallel_solve(board, strategy="mrv", stats=None, timeout=None, max_nodes=None, cancel=None):
+    return default_solver().solve(board, strategy, timeout, max_nodes, cancel, stats)
+
+def parallel_count_solutions(board, limit=2, stats=None):
+    return default_solver().count_solutions(board, limit, stats)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the parallel solver on hard puzzles against the number of workers.")
+    parser.add_argument("path", help="file with one puzzle per line")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to time (default: 1 2 4)")
+    parser.add_argument("--strategy", choices=["mrv", "first"], default="mrv")
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N puzzles")
+    args = parser.parse_args(argv)
+
+    with open(args.path) as f:
+        puzzles = [parse_puzzle(line) for line in f if line.strip()][:args.limit]
+    for workers in args.workers:
+        with ParallelSolver(workers) as solver:
+            worst = total = 0.0
+            for puzzle in puzzles:
+                board = Board.from_rows(puzzle)
+                result = solver.solve(board, args.strategy)
+                if not result:
+                    print(f"Puzzle not solved: {result.status}", file=sys.stderr)
+                    return 1
+                worst = max(worst, result.seconds)
+                total += result.seconds
+        print(f"{workers} workers: mean {total / len(puzzles) * 1000:.1f} ms, worst {worst * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# Pre-generated puzzle pool with background refill.
+# Keeps a queue of ready puzzles per difficulty so serving one is O(1).
+# A background thread tops a queue up to the high watermark whenever it drops
+# below the low watermark. The pool can be saved to and loaded from a JSON
+# file so a new session does not start empty. A pool holds puzzles of one
+# board size (box=3 for 9x9, 4 for 16x16, 5 for 25x25).
+import json
+import os
+import threading
+from collections import deque
+from sudoku_core import Board, SolverState, difficulties, geometry, new_board, generate_puzzle, format_puzzle, parse_puzzle
+
+class PuzzlePool:
+    def __init__(self, size=10, low=None, high=None, path=None, levels=None, box=3):
+        # size is the default high watermark; low defaults to a quarter of it
+        self.high = size if high is None else high
+        self.low = max(1, self.high // 4) if low is None else low
+        if not 0 <= self.low <= self.high:
+            raise ValueError("Watermarks must satisfy 0 <= low <= high")
+        self.path = path
+        self.box = box
+        self.ncells = geometry(box).ncells
+        self.levels = list(difficulties) if levels is None else list(levels)
+        self.queues = {level: deque() for level in self.levels}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        if path is not None:
+            self.load()
+
+    def start(self):
+        # Start the background refill thread
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._refill_loop, name="puzzle-pool", daemon=True)
+        self.thread.start()
+
+    def stop(self, save=True):
+        # Stop the refill thread and save the pool if it has a path
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if save and self.path is not None:
+            self.save()
+
+    def get(self, difficulty):
+        # Return a ready puzzle as a board, generating one on the spot if the
+        # queue is empty, and wake the refill thread when the queue runs low
+        with self.condition:
+            queue = self.queues[difficulty]
+            text = queue.popleft() if queue else None
+            if len(queue) < self.low:
+                self.condition.notify()
+        if text is None:
+            return generate_puzzle(new_board(self.box), difficulty)
+        return Board.from_text(text)
+
+    def available(self, difficulty):
+        # Number of ready puzzles for a difficulty
+        with self.condition:
+            return len(self.queues[difficulty])
+
+    def _next_level_to_fill(self):
+        # The first difficulty below its low watermark, or None (call with the lock held)
+        for level in self.levels:
+            if len(self.queues[level]) < self.low:
+                return level
+        return None
+
+    def _refill_loop(self):
+        # Background worker: fill low queues up to the high watermark
+        while True:
+            with self.condition:
+                level = self._next_level_to_fill()
+                while self.running and level is None:
+                    self.condition.wait()
+                    level = self._next_level_to_fill()
+                if not self.running:
+                    return
+            while True:
+                # Generate outside the lock so get() never waits on the generator
+                text = format_puzzle(generate_puzzle(new_board(self.box), level))
+                with self.condition:
+                    self.queues[level].append(text)
+                    if not self.running or len(self.queues[level]) >= self.high:
+                        break
+
+    def save(self):
+        # Write the ready puzzles to the pool file
+        with self.condition:
+            data = {level: list(queue) for level, queue in self.queues.items()}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)  # Never leave a half-written pool file
+
+    def load(self):
+        # Read puzzles saved by save(). A missing or damaged file leaves the pool
+        # empty, and entries that are not valid puzzles of the pool's size are dropped.
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        with self.condition:
+            for level, texts in data.items():
+                if level in self.queues and isinstance(texts, list):
+                    for text in texts[:self.high]:
+                        if self._valid_entry(text):
+                            self.queues[level].append(text)
+
+    def _valid_entry(self, text):
+        # True if a saved entry is a puzzle string of the pool's size whose givens break no rule
+        if not isinstance(text, str) or len(text) != self.ncells:
+            return False
+        try:
+            board = parse_puzzle(text)
+        except ValueError:
+            return False
+        return SolverState(board).valid
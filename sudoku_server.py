@@ -0,0 +1,420 @@
+# Local HTTP/JSON service for solving, generating and grading puzzles.
+# An asyncio front end parses requests and queues the work; a dispatcher takes
+# queued jobs in batches and runs each batch in a process pool, so CPU-bound
+# solves never block the event loop. Solves and generated puzzles have time
+# limits, and a batch only starts jobs during its first BATCH_BUDGET_S seconds,
+# so one slow job cannot hold up a whole batch behind it. The queue is bounded: when it is full the
+# server answers 429 at once instead of letting latency grow. Standard library
+# only, so it runs offline.
+#
+# Endpoints (JSON in and out):
+#     POST /solve     {"puzzle": "...", "strategy": "mrv", "backend": "backtrack", "timeout": 5}
+#     POST /generate  {"difficulty": "Medium", "box": 3}
+#     POST /grade     {"puzzle": "..."}
+#     GET  /health
+#     GET  /metrics
+# Usage:
+#     python sudoku_server.py --port 8080 --workers 4
+#     python sudoku_server.py --port 8080 --load-test 5000 --concurrency 64 --corpus puzzles/hard.txt
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import json
+import math
+import multiprocessing
+import sys
+import time
+from sudoku_core import Board, difficulties, format_puzzle, generate_puzzle, new_board, parse_puzzle, percentile, solve
+
+# Queued jobs beyond which requests are answered with 429
+QUEUE_SIZE = 1024
+# Jobs sent to a worker together, and how long the dispatcher waits to fill a batch
+BATCH_SIZE = 32
+BATCH_WAIT_S = 0.002
+# A worker starts no new job of a batch after this many seconds and hands the
+# rest back to be dispatched again, so a job waits behind at most one slow job
+# of its batch rather than all of them
+BATCH_BUDGET_S = 0.5
+# Upper bound on the search time of one solve, whatever the request asks for
+SOLVE_TIMEOUT_S = 10.0
+# Upper bound on the digit removal of one generated puzzle (25x25 "Hard" can
+# take seconds); a generator that runs out returns an easier puzzle
+GENERATE_TIMEOUT_S = 2.0
+# Largest request body accepted, in bytes, and most header lines per request.
+# A single request or header line may be up to the stream reader's 64 KiB limit.
+MAX_BODY = 64 * 1024
+MAX_HEADERS = 100
+# Latencies kept for the percentiles in /metrics
+LATENCY_WINDOW = 4096
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 429: "Too Many Requests", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error"}
+
+ENDPOINTS = ("/solve", "/generate", "/grade", "/health", "/metrics")
+
+class BadRequest(Exception):
+    # A request the server cannot act on; args are (status, message)
+    pass
+
+def _run_job(job):
+    # Worker: do one queued job and return its JSON-ready result
+    kind = job[0]
+    if kind == "solve":
+        _, text, strategy, backend, timeout = job
+        board = Board.from_text(text)
+        result = solve(board, strategy=strategy, backend=backend, timeout=timeout)
+        return {"status": result.status, "solution": format_puzzle(board) if result else None,
+                "nodes": result.nodes, "seconds": result.seconds}
+    if kind == "generate":
+        _, difficulty, box = job
+        puzzle = generate_puzzle(new_board(box), difficulty, timeout=GENERATE_TIMEOUT_S)
+        return {"puzzle": format_puzzle(puzzle), "difficulty": difficulty}
+    from sudoku_logic import grade  # Only grading workers need the deduction engine
+    level, technique = grade(parse_puzzle(job[1]))
+    return {"grade": level, "technique": technique}
+
+def _run_batch(jobs, budget=BATCH_BUDGET_S):
+    # Worker: run a batch of jobs; one failing job does not fail the others.
+    # Once budget seconds have passed no further job is started: the results
+    # cover a prefix of jobs and the caller dispatches the rest again.
+    start = time.perf_counter()
+    results = []
+    for job in jobs:
+        if results and time.perf_counter() - start >= budget:
+            break
+        try:
+            results.append(_run_job(job))
+        except Exception as error:
+            results.append({"error": str(error)})
+    return results
+
+class SudokuService:
+    # The HTTP front end, the bounded job queue and the batch dispatcher
+    def __init__(self, workers=None, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT_S,
+                 solve_timeout=SOLVE_TIMEOUT_S, batch_budget=BATCH_BUDGET_S):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.batch_budget = batch_budget
+        self.solve_timeout = solve_timeout
+        self.queue = asyncio.Queue(queue_size)
+        self.slots = asyncio.Semaphore(self.workers)  # One batch in flight per worker
+        self.pool = None
+        self.server = None
+        self.dispatcher = None
+        self.running = set()  # Batch tasks, referenced until they finish
+        self.connections = {}  # Writer -> handler task of every open client connection
+        self.started = time.time()
+        self.requests = collections.Counter()  # Per endpoint
+        self.responses = collections.Counter()  # Per status code
+        self.batches = 0
+        self.batched_jobs = 0
+        self.requeued_jobs = 0
+        self.in_flight = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+        # Start the workers before accepting connections: a worker forked later
+        # would inherit the open client sockets and keep them from closing
+        await asyncio.get_running_loop().run_in_executor(self.pool, _run_batch, [])
+        self.dispatcher = asyncio.create_task(self._dispatch())
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            handlers = list(self.connections.values())
+            for writer in list(self.connections):
+                writer.close()  # Ends idle keep-alive connections, whose handlers wait on a read
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def submit(self, job):
+        # Queue a job and wait for its result; raises BadRequest(429) when the queue is full
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((job, future))
+        except asyncio.QueueFull:
+            raise BadRequest(429, "Server busy, try again later") from None
+        return await future
+
+    async def _dispatch(self):
+        # Wait for a job and a free worker, then take up to batch_size queued jobs,
+        # waiting at most batch_wait for the batch to fill, and hand them to the pool
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            await self.slots.acquire()
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                if self.queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            self._spawn(self._run(batch))
+
+    def _spawn(self, coro):
+        # Run a batch task, keeping a reference until it finishes
+        task = asyncio.create_task(coro)
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+
+    async def _run(self, batch):
+        # Run one batch in the pool (the caller holds a worker slot) and resolve
+        # the futures of its requests. Jobs the worker had no time for are run as
+        # a new batch as soon as a worker is free.
+        self.batches += 1
+        self.batched_jobs += len(batch)
+        self.in_flight += 1
+        rest = []
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.pool, _run_batch, [job for job, _ in batch], self.batch_budget)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            rest = batch[len(results):]
+        finally:
+            self.in_flight -= 1
+            self.slots.release()
+        if rest:
+            self.requeued_jobs += len(rest)
+            await self.slots.acquire()
+            await self._run(rest)
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+        return {
+            "uptime_s": time.time() - self.started,
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "batches_in_flight": self.in_flight,
+            "requests": dict(self.requests),
+            "responses": {str(code): count for code, count in self.responses.items()},
+            "rejected": self.responses[429],
+            "batches": self.batches,
+            "mean_batch_size": self.batched_jobs / self.batches if self.batches else 0.0,
+            "requeued_jobs": self.requeued_jobs,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+
+    async def route(self, method, path, body):
+        # Answer one request with (status, payload)
+        self.requests[path if path in ENDPOINTS else "other"] += 1
+        if path == "/health":
+            return 200, {"status": "ok", "queue_depth": self.queue.qsize(), "workers": self.workers}
+        if path == "/metrics":
+            return 200, self.metrics()
+        if path not in ENDPOINTS:
+            raise BadRequest(404, f"No such endpoint: {path}")
+        if method != "POST":
+            raise BadRequest(405, f"{path} takes POST")
+        try:
+            params = json.loads(body or b"{}")
+        except ValueError:
+            raise BadRequest(400, "Body is not valid JSON") from None
+        if not isinstance(params, dict):
+            raise BadRequest(400, "Body must be a JSON object")
+        if path == "/generate":
+            difficulty = params.get("difficulty", "Medium")
+            box = params.get("box", 3)
+            if not isinstance(difficulty, str) or difficulty not in difficulties:
+                raise BadRequest(400, f"difficulty must be one of {', '.join(difficulties)}")
+            if isinstance(box, bool) or not isinstance(box, int) or box not in (2, 3, 4, 5):
+                raise BadRequest(400, "box must be 2, 3, 4 or 5")
+            return 200, await self.submit(("generate", difficulty, box))
+        text = params.get("puzzle")
+        if not isinstance(text, str):
+            raise BadRequest(400, "puzzle must be a string")
+        try:
+            parse_puzzle(text)  # Reject malformed puzzles here rather than in a worker
+        except ValueError as error:
+            raise BadRequest(400, str(error)) from None
+        if path == "/grade":
+            return 200, await self.submit(("grade", text.strip()))
+        strategy = params.get("strategy", "mrv")
+        backend = params.get("backend", "backtrack")
+        if strategy not in ("mrv", "first") or backend not in ("backtrack", "dlx"):
+            raise BadRequest(400, "strategy must be mrv or first and backend backtrack or dlx")
+        timeout = params.get("timeout", self.solve_timeout)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout < math.inf:
+            raise BadRequest(400, "timeout must be a positive number of seconds")
+        return 200, await self.submit(("solve", text.strip(), strategy, backend, min(timeout, self.solve_timeout)))
+
+    async def handle(self, reader, writer):
+        # Serve the requests of one connection, keeping it open between requests
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except BadRequest as error:
+                    await self._respond(writer, error.args[0], {"error": error.args[1]}, False, None)
+                    break
+                if request is None:
+                    break
+                method, path, keep_alive, body = request
+                start = time.perf_counter()
+                try:
+                    status, payload = await self.route(method, path, body)
+                except BadRequest as error:
+                    status, payload = error.args[0], {"error": error.args[1]}
+                except Exception as error:
+                    status, payload = 500, {"error": str(error)}
+                if "error" in payload and status == 200:
+                    status = 500  # The job itself failed in the worker
+                await self._respond(writer, status, payload, keep_alive, start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive, start):
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+        if status == 429:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode() + b"\r\n" + body)
+        await writer.drain()
+        self.responses[status] += 1
+        if start is not None and status == 200:
+            self.latencies.append(time.perf_counter() - start)
+
+async def _read_line(reader):
+    # One line of the request head; a line over the reader's limit is answered with 431
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise BadRequest(431, "Request line or header too long") from None
+
+async def _read_request(reader):
+    # Read one HTTP/1.1 request. Returns (method, path, keep_alive, body), or
+    # None when the client closed the connection
+    line = await _read_line(reader)
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise BadRequest(400, "Malformed request line") from None
+    headers = {}
+    for count in itertools.count():
+        line = await _read_line(reader)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if count >= MAX_HEADERS:
+            raise BadRequest(431, f"More than {MAX_HEADERS} header lines")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise BadRequest(400, "Bad Content-Length") from None
+    if length < 0:
+        raise BadRequest(400, "Bad Content-Length")
+    if length > MAX_BODY:
+        raise BadRequest(413, f"Body over {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return method, target.split("?", 1)[0], keep_alive, body
+
+async def load_test(host, port, puzzles, requests, concurrency):
+    # Send requests POST /solve calls over concurrency keep-alive connections,
+    # cycling through puzzles, and return latencies and response counts
+    latencies = []
+    statuses = collections.Counter()
+    counter = iter(range(requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for n in counter:
+                body = json.dumps({"puzzle": puzzles[n % len(puzzles)]}).encode()
+                start = time.perf_counter()
+                writer.write(f"POST /solve HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+                status = int((await reader.readline()).split()[1])
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] += 1
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses
+
+async def _serve(args):
+    service = SudokuService(args.workers, args.queue_size, args.batch_size)
+    server = await service.start(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port} with {service.workers} workers", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+async def _load(args):
+    with open(args.corpus) as f:
+        puzzles = [line.strip() for line in f if line.strip()]
+    start = time.perf_counter()
+    latencies, statuses = await load_test(args.host, args.port, puzzles, args.load_test, args.concurrency)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.2f} s ({len(latencies) / elapsed:.1f}/s), "
+          f"p50 {percentile(latencies, 50) * 1000:.2f} ms, p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    print("responses: " + " ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the solver and generator over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="queued jobs before answering 429")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="jobs sent to a worker at once")
+    parser.add_argument("--load-test", type=int, default=0, metavar="N",
+                        help="instead of serving, send N solve requests to a running server")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections used by --load-test")
+    parser.add_argument("--corpus", default="puzzles/easy.txt", help="puzzles sent by --load-test")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_load(args) if args.load_test else _serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
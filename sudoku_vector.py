@@ -0,0 +1,149 @@
+# NumPy-vectorized batch solving.
+# N boards are kept as one (N, 9, 9) uint8 array. Row, column and box occupancy
+# masks, candidate sets and naked/hidden singles are computed for the whole
+# batch at once; only boards that are still open after propagation fall back
+# to the per-board backtracking solver in sudoku_core.
+# NumPy is only needed by this module, not by the rest of the solver.
+import numpy as np
+from sudoku_core import format_puzzle, parse_puzzle, solve
+
+ALL_DIGITS = 0x1FF
+DIGITS = np.arange(1, 10, dtype=np.uint8)
+SHIFTS = np.arange(9, dtype=np.uint16)
+# Value (0..9) to its digit bit, and single-bit mask to its digit
+VALUE_BITS = np.array([0] + [1 << d for d in range(9)], dtype=np.uint16)
+DIGIT_OF_MASK = np.zeros(ALL_DIGITS + 1, dtype=np.uint8)
+DIGIT_OF_MASK[VALUE_BITS[1:]] = DIGITS
+
+def to_array(puzzles):
+    # Stack puzzles (81-character strings or 9x9 boards) into an (N, 9, 9) uint8 array
+    rows = []
+    for puzzle in puzzles:
+        if not isinstance(puzzle, str):
+            puzzle = format_puzzle(puzzle)
+        text = puzzle.strip().replace(".", "0").encode()
+        values = np.frombuffer(text, dtype=np.uint8) - ord("0")  # Other characters wrap to values above 9
+        if len(text) != 81 or (values > 9).any():
+            parse_puzzle(puzzle)  # Raises the ValueError that names the bad length or character
+            raise ValueError("Expected an 81-character 9x9 puzzle")
+        rows.append(values)
+    if not rows:
+        return np.zeros((0, 9, 9), dtype=np.uint8)
+    return np.stack(rows).reshape(-1, 9, 9)
+
+def _box_view(cells):
+    # (N, 9, 9, ...) grid to (N, box, cell-in-box, ...)
+    n = cells.shape[0]
+    rest = cells.shape[3:]
+    return cells.reshape((n, 3, 3, 3, 3) + rest).swapaxes(2, 3).reshape((n, 9, 9) + rest)
+
+def occupancy_masks(boards):
+    # Masks of the digits placed in every row, column and box: three (N, 9) arrays
+    bits = VALUE_BITS[boards]
+    rows = np.bitwise_or.reduce(bits, axis=2)
+    cols = np.bitwise_or.reduce(bits, axis=1)
+    boxes = np.bitwise_or.reduce(_box_view(bits), axis=2)
+    return rows, cols, boxes
+
+def candidates(boards, masks=None):
+    # (N, 9, 9) candidate masks; filled cells have no candidates
+    rows, cols, boxes = occupancy_masks(boards) if masks is None else masks
+    n = boards.shape[0]
+    box_grid = np.broadcast_to(boxes.reshape(n, 3, 1, 3, 1), (n, 3, 3, 3, 3)).reshape(n, 9, 9)
+    used = rows[:, :, None] | cols[:, None, :] | box_grid
+    return np.where(boards == 0, ~used & ALL_DIGITS, 0).astype(np.uint16)
+
+def has_duplicates(boards):
+    # (N,) bool: some row, column or box holds a digit twice.
+    # Digit bits only add up to their OR when no bit repeats.
+    bits = VALUE_BITS[boards]
+    rows, cols, boxes = occupancy_masks(boards)
+    return ((bits.sum(axis=2, dtype=np.uint16) != rows).any(axis=1) |
+            (bits.sum(axis=1, dtype=np.uint16) != cols).any(axis=1) |
+            (_box_view(bits).sum(axis=2, dtype=np.uint16) != boxes).any(axis=1))
+
+def _propagate_step(boards):
+    # One vectorized pass of naked and hidden singles over a batch of open boards.
+    # Returns the new boards and a (N,) bool array of boards found contradictory.
+    masks = occupancy_masks(boards)
+    cand = candidates(boards, masks)
+    empty = boards == 0
+    dead = (empty & (cand == 0)).any(axis=(1, 2))
+
+    # Naked singles: one candidate left
+    naked = empty & (cand != 0) & ((cand & (cand - 1)) == 0)
+    result = np.where(naked, DIGIT_OF_MASK[cand], boards)
+
+    # Hidden singles: a digit with one possible cell in a row, column or box
+    cand_bits = ((cand[..., None] >> SHIFTS) & 1).astype(np.uint8)  # (N, row, col, digit)
+    units = (("row", cand_bits, masks[0]),
+             ("col", cand_bits.swapaxes(1, 2), masks[1]),
+             ("box", _box_view(cand_bits), masks[2]))
+    for kind, per_unit, placed in units:
+        # per_unit is (N, unit, position-in-unit, digit)
+        counts = per_unit.sum(axis=2)
+        missing = ((placed[..., None] >> SHIFTS) & 1) == 0
+        dead |= ((counts == 0) & missing).any(axis=(1, 2))
+        b, u, d = np.nonzero((counts == 1) & missing)
+        pos = per_unit[b, u, :, d].argmax(axis=1)
+        if kind == "row":
+            r, c = u, pos
+        elif kind == "col":
+            r, c = pos, u
+        else:
+            r, c = (u // 3) * 3 + pos // 3, (u % 3) * 3 + pos % 3
+        still_empty = result[b, r, c] == 0
+        result[b[still_empty], r[still_empty], c[still_empty]] = DIGITS[d[still_empty]]
+    dead |= has_duplicates(result)
+    return result, dead
+
+def propagate(boards, max_passes=81):
+    # Apply singles to every board until nothing changes.
+    # Returns the propagated boards and a (N,) bool array of unsolvable boards.
+    boards = boards.copy()
+    dead = has_duplicates(boards)
+    open_idx = np.nonzero(~dead & (boards == 0).any(axis=(1, 2)))[0]
+    for _ in range(max_passes):
+        if open_idx.size == 0:
+            break
+        before = boards[open_idx]
+        after, dead_now = _propagate_step(before)
+        boards[open_idx] = after
+        dead[open_idx] |= dead_now
+        changed = (after != before).any(axis=(1, 2))
+        # Keep only boards that moved, are still consistent and still have blanks
+        keep = changed & ~dead_now & (after == 0).any(axis=(1, 2))
+        open_idx = open_idx[keep]
+    return boards, dead
+
+def solve_batch(puzzles, strategy="mrv", backend="backtrack", stats=None, timeout=None, max_nodes=None,
+                statuses=None, nodes=None):
+    # Solve a batch of puzzles. Returns the (N, 9, 9) solutions and a (N,) bool
+    # array telling which puzzles were solved. If stats is a dict it gets the
+    # number of boards finished by propagation alone and by per-board search.
+    # timeout and max_nodes limit each per-board search; if statuses is a list
+    # it is filled with the SolveResult status of every puzzle, and if nodes is
+    # a list with the search nodes of every puzzle (0 when propagation solved it).
+    boards = puzzles if isinstance(puzzles, np.ndarray) else to_array(puzzles)
+    invalid = has_duplicates(boards)  # Givens that already break a rule, as sudoku_core.solve reports them
+    boards, dead = propagate(boards)
+    solved = ~dead & ~(boards == 0).any(axis=(1, 2))
+    needs_search = np.nonzero(~dead & ~solved)[0]
+    if stats is not None:
+        stats["propagated"] = stats.get("propagated", 0) + int(solved.sum())
+        stats["searched"] = stats.get("searched", 0) + int(needs_search.size)
+    if statuses is not None:
+        statuses[:] = ["solved" if ok else "invalid" if bad else "unsolvable" for ok, bad in zip(solved, invalid)]
+    if nodes is not None:
+        nodes[:] = [0] * len(solved)
+    for i in needs_search:
+        board = boards[i].tolist()
+        result = solve(board, strategy=strategy, backend=backend, timeout=timeout, max_nodes=max_nodes)
+        if result:
+            boards[i] = board
+            solved[i] = True
+        if statuses is not None:
+            statuses[i] = result.status
+        if nodes is not None:
+            nodes[i] = result.nodes
+    return boards, solved